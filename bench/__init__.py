@@ -0,0 +1,11 @@
+"""
+Offline benchmarks for the site parsers.
+
+Recorded listing/feed/detail pages live in bench/fixtures/<site>/ with a manifest.json
+mapping each URL to its file; they're served through sites.fetch.set_fetcher(), so no
+request ever leaves the machine. Expected parse output lives in bench/golden/<site>.json.
+
+    python -m bench.run                    # time every site, check goldens
+    python -m bench.run --update-golden    # after an intended extraction change
+    python -m bench.record --site stoday   # refresh fixtures from the live site
+"""
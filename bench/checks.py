@@ -0,0 +1,97 @@
+"""
+Behaviour checks that don't fit the fixture goldens; bench.run runs them after the sites
+and exits non-zero if any fails. Each check returns a list of problems (empty = ok).
+"""
+import http.server
+import threading
+from typing import Callable, List, Tuple
+
+from sites import dates, fetch
+from sites.regions import EndOf
+
+def _server(body: bytes, chunked: bool = False) -> Tuple[http.server.HTTPServer, set]:
+    """Local keep-alive server for body; the returned set collects one entry per TCP connection."""
+    conns = set()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            conns.add(self.client_address)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            if chunked:
+                self.send_header("Transfer-Encoding", "chunked")
+            else:
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                if not chunked:
+                    self.wfile.write(body)
+                    return
+                for i in range(0, len(body), 4096):
+                    part = body[i:i + 4096]
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+                self.wfile.write(b"0\r\n\r\n")
+            except OSError:
+                pass  # the client cut a long body off, as it should
+
+        def log_message(self, *args):
+            pass
+
+    class Server(http.server.ThreadingHTTPServer):
+        def handle_error(self, request, client_address):
+            pass  # resets from connections the client closed on purpose
+
+    srv = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, conns
+
+def early_stop_keepalive() -> List[str]:
+    """An early stop leaves the connection reusable unless the rest is over DRAIN_BYTES."""
+    head = b"<html><body><main><p>post</p></main>"
+    short = head + b"<aside>" + b"x" * (fetch.CHUNK * 2) + b"</aside></body></html>"
+    long = head + b"<aside>" + b"x" * (fetch.DRAIN_BYTES * 4) + b"</aside></body></html>"
+    problems = []
+    for label, body, chunked, want_conns in (("short rest", short, False, 1), ("short rest, chunked", short, True, 1),
+                                             ("long rest", long, False, 3)):
+        srv, conns = _server(body, chunked)
+        prev = fetch.set_fetcher(None)
+        try:
+            url = f"http://127.0.0.1:{srv.server_port}/page"
+            for _ in range(3):
+                r = fetch.get(url, until=EndOf("main").until(), min_interval=0, jitter=0)
+                if b"</main>" not in r.content or len(r.content) >= len(body):
+                    problems.append(f"{label}: read {len(r.content)} of {len(body)} bytes, expected an early stop")
+        finally:
+            fetch.set_fetcher(prev)
+            srv.shutdown()
+            srv.server_close()
+        if len(conns) != want_conns:
+            problems.append(f"{label}: 3 early-stop GETs used {len(conns)} connections, expected {want_conns}")
+    return problems
+
+def date_zones() -> List[str]:
+    """A time followed by a zone word is read in that zone, or left to dateparser; never as UTC."""
+    cases = (
+        ("Nov 30, 2025 11:59 PM Pacific", "2025-12-01T07:59:00+00:00"),
+        ("November 30, 2025 11:59 PM Eastern Time", "2025-12-01T04:59:00+00:00"),
+        ("Nov 30, 2025 11:59 PM ET", "2025-12-01T04:59:00+00:00"),
+        ("11/30/2025 11:59 PM Frequency: Daily", "2025-11-30T23:59:00+00:00"),
+    )
+    problems = []
+    for raw, want in cases:
+        got = dates.parse_date(raw)
+        if (got and got.isoformat()) != want:
+            problems.append(f"{raw!r}: got {got and got.isoformat()}, expected {want}")
+    if dates._fast("Nov 30, 2025 11:59 PM Hawaii") is not None:
+        problems.append("'Nov 30, 2025 11:59 PM Hawaii': unknown zone word parsed on the fast path")
+    return problems
+
+CHECKS: List[Tuple[str, Callable[[], List[str]]]] = [
+    ("early_stop_keepalive", early_stop_keepalive),
+    ("date_zones", date_zones),
+]
+
+def run_all() -> List[Tuple[str, List[str]]]:
+    return [(name, check()) for name, check in CHECKS]
@@ -0,0 +1,74 @@
+"""
+Re-record a site's fixtures from the live site: its listing/feed plus up to --details
+detail pages, written to bench/fixtures/<site>/ with a fresh manifest.json. Requests go
+through the normal politeness/cloudscraper path. Review the diff, then refresh the goldens
+with `python -m bench.run --update-golden`.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from sites import fetch, load_module
+from bench.run import FIXTURES
+
+def _name(url: str, body: bytes, taken: Dict[str, str]) -> str:
+    path = urlparse(url).path.rstrip("/")
+    slug = re.sub(r"[^a-z0-9-]+", "-", path.rsplit("/", 1)[-1].lower()).strip("-") or "index"
+    ext = ".xml" if body.lstrip().startswith(b"<?xml") else ".html"
+    name = f"{slug}{ext}"
+    if name in taken.values():
+        name = f"{slug}-{hashlib.sha1(url.encode()).hexdigest()[:8]}{ext}"
+    return name
+
+def record(site_key: str, details: int) -> Dict[str, str]:
+    mod = load_module(site_key)
+    pages: Dict[str, bytes] = {}
+
+    def recorder(url: str, headers: Optional[dict] = None):
+        prev = fetch.set_fetcher(None)  # this one request goes to the network
+        try:
+            r = fetch.get(url, headers=headers)
+        finally:
+            fetch.set_fetcher(prev)
+        pages[url] = r.content
+        return r
+
+    prev = fetch.set_fetcher(recorder)
+    try:
+        urls: List[str] = mod.list_recent(n=details, pages=1)
+        for u in urls[:details]:
+            mod.parse_detail(u)
+    finally:
+        fetch.set_fetcher(prev)
+
+    d = os.path.join(FIXTURES, site_key)
+    os.makedirs(d, exist_ok=True)
+    manifest: Dict[str, str] = {}
+    for url, body in pages.items():
+        manifest[url] = _name(url, body, manifest)
+        with open(os.path.join(d, manifest[url]), "wb") as f:
+            f.write(body)
+    for stale in set(os.listdir(d)) - set(manifest.values()) - {"manifest.json"}:
+        if stale.endswith((".html", ".xml")):
+            os.remove(os.path.join(d, stale))
+    with open(os.path.join(d, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return manifest
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Record live pages as bench fixtures")
+    ap.add_argument("--site", required=True)
+    ap.add_argument("--details", type=int, default=4, help="Detail pages to record")
+    args = ap.parse_args(argv)
+    manifest = record(args.site, args.details)
+    print(f"[record] {args.site}: {len(manifest)} pages -> {os.path.join(FIXTURES, args.site)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
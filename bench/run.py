@@ -0,0 +1,185 @@
+"""
+Time list_recent and parse_html per site against the recorded fixtures and check the
+extracted fields against the goldens, then run bench.checks. Exits 1 if any golden doesn't
+match or a check fails.
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from bench.checks import run_all as run_checks
+from sites import fetch, list_sites, load_module
+from sites.dates import clear_cache
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, "fixtures")
+GOLDEN = os.path.join(HERE, "golden")
+
+def _response(url: str, body: bytes, status: int = 200, content_type: str = "text/html; charset=UTF-8") -> requests.Response:
+    r = requests.Response()
+    r.url = url
+    r.status_code = status
+    r.reason = "OK" if status == 200 else "Not Found"
+    r.headers["Content-Type"] = content_type
+    r._content = body
+    r.encoding = "utf-8"
+    return r
+
+def load_fixtures(site_key: str) -> Dict[str, bytes]:
+    """url -> recorded body for one site."""
+    d = os.path.join(FIXTURES, site_key)
+    with open(os.path.join(d, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    pages = {}
+    for url, name in manifest.items():
+        with open(os.path.join(d, name), "rb") as f:
+            pages[url] = f.read()
+    return pages
+
+def replay(pages: Dict[str, bytes]) -> Callable[[str, Optional[dict]], requests.Response]:
+    """A sites.fetch fetcher serving pages; anything unrecorded is a 404."""
+    def fetcher(url: str, headers: Optional[dict] = None) -> requests.Response:
+        body = pages.get(url)
+        if body is None:
+            return _response(url, b"", status=404)
+        ctype = "application/rss+xml; charset=UTF-8" if body.lstrip().startswith(b"<?xml") else "text/html; charset=UTF-8"
+        return _response(url, body, content_type=ctype)
+    return fetcher
+
+def _jsonable(item: dict) -> dict:
+    return {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in sorted(item.items())}
+
+def extract(mod, n: int = 40) -> dict:
+    """
+    What the site pulls out of the fixtures: discovered URLs, every parsed detail page and,
+    for feed-first sites, what feed_item makes of each feed entry (None = page fallback).
+    """
+    urls = mod.list_recent(n=n, pages=1)
+    out = {"list_recent": urls, "items": {u: _jsonable(mod.parse_detail(u)) for u in urls}}
+    if hasattr(mod, "feed_item"):
+        out["feed_items"] = {u: (lambda it: it and _jsonable(it))(mod.feed_item(u)) for u in urls}
+    return out
+
+def diff_golden(expected: dict, actual: dict) -> List[str]:
+    problems = []
+    if expected.get("list_recent") != actual["list_recent"]:
+        problems.append(f"list_recent: expected {expected.get('list_recent')} got {actual['list_recent']}")
+    for section in ("items", "feed_items"):
+        exp_items, act_items = expected.get(section, {}), actual.get(section, {})
+        for url in sorted(set(exp_items) | set(act_items)):
+            e, a = exp_items.get(url), act_items.get(url)
+            if e is None or a is None:
+                if e != a:
+                    problems.append(f"{section} {url}: expected {e!r} got {a!r}")
+                continue
+            for field in sorted(set(e) | set(a)):
+                if e.get(field) != a.get(field):
+                    problems.append(f"{section} {url} [{field}]: expected {e.get(field)!r} got {a.get(field)!r}")
+    return problems
+
+def _pct(vals: List[float], q: float) -> float:
+    vals = sorted(vals)
+    return vals[int(q * (len(vals) - 1))] if vals else 0.0
+
+def bench_site(site_key: str, rounds: int, update_golden: bool) -> dict:
+    mod = load_module(site_key)
+    prev = fetch.set_fetcher(replay(load_fixtures(site_key)))
+    try:
+        # first pass doubles as warm-up (lazy imports, dateparser's language data) and golden check
+        actual = extract(mod)
+        golden_path = os.path.join(GOLDEN, f"{site_key}.json")
+        if update_golden:
+            os.makedirs(GOLDEN, exist_ok=True)
+            with open(golden_path, "w", encoding="utf-8") as f:
+                json.dump(actual, f, indent=2, sort_keys=True)
+                f.write("\n")
+            problems: List[str] = []
+        elif os.path.exists(golden_path):
+            with open(golden_path, encoding="utf-8") as f:
+                problems = diff_golden(json.load(f), actual)
+        else:
+            problems = [f"no golden file {golden_path} (run with --update-golden)"]
+        urls = actual["list_recent"]
+        bodies = [(u, mod.fetch_detail(u)) for u in urls]
+
+        list_times: List[float] = []
+        parse_times: List[float] = []
+        gc.collect()
+        for _ in range(rounds):
+            clear_cache()  # each round parses dates like a fresh process would
+            t = time.perf_counter()
+            mod.list_recent(n=40, pages=1)
+            list_times.append(time.perf_counter() - t)
+            for u, body in bodies:
+                t = time.perf_counter()
+                mod.parse_html(u, body)
+                parse_times.append(time.perf_counter() - t)
+
+        # separate pass: tracemalloc slows everything down, so it isn't timed
+        clear_cache()
+        tracemalloc.start()
+        try:
+            mod.list_recent(n=40, pages=1)
+            for u, body in bodies:
+                mod.parse_html(u, body)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    finally:
+        fetch.set_fetcher(prev)
+
+    return {
+        "site": site_key,
+        "pages": len(urls),
+        "rounds": rounds,
+        "list_p50_ms": _pct(list_times, 0.5) * 1000,
+        "list_p95_ms": _pct(list_times, 0.95) * 1000,
+        "parse_p50_ms": _pct(parse_times, 0.5) * 1000,
+        "parse_p95_ms": _pct(parse_times, 0.95) * 1000,
+        "parse_mean_ms": (statistics.mean(parse_times) * 1000) if parse_times else 0.0,
+        "pages_per_s": (len(parse_times) / sum(parse_times)) if parse_times else 0.0,
+        "peak_mib": peak / (1024 * 1024),
+        "golden_ok": not problems,
+        "golden_problems": problems,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Offline parser benchmarks against recorded fixtures")
+    ap.add_argument("--sites", default="all", help="Comma list or 'all'")
+    ap.add_argument("--rounds", type=int, default=20, help="Timed passes over each site's fixtures")
+    ap.add_argument("--update-golden", action="store_true", help="Rewrite the golden outputs from the current parsers")
+    ap.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    args = ap.parse_args(argv)
+
+    sites = list_sites() if args.sites == "all" else [s.strip() for s in args.sites.split(",") if s.strip()]
+    sites = [s for s in sites if os.path.isdir(os.path.join(FIXTURES, s))]
+    results = [bench_site(s, args.rounds, args.update_golden) for s in sites]
+
+    print(f"{'site':<14}{'pages':>6}{'list p50':>10}{'parse p50':>11}{'p95':>9}{'pages/s':>9}{'peak MiB':>10}  golden")
+    for r in results:
+        print(f"{r['site']:<14}{r['pages']:>6}{r['list_p50_ms']:>8.1f}ms{r['parse_p50_ms']:>9.1f}ms{r['parse_p95_ms']:>7.1f}ms"
+              f"{r['pages_per_s']:>9.1f}{r['peak_mib']:>10.2f}  {'ok' if r['golden_ok'] else 'MISMATCH'}")
+        for p in r["golden_problems"]:
+            print(f"    {p}")
+    checks = run_checks()
+    print(f"\n{'check':<28}result")
+    for name, problems in checks:
+        print(f"{name:<28}{'ok' if not problems else 'FAIL'}")
+        for p in problems:
+            print(f"    {p}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0 if all(r["golden_ok"] for r in results) and not any(p for _, p in checks) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
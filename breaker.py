@@ -0,0 +1,94 @@
+"""
+Per-site circuit breaker for sites that start blocking us (403/429/5xx, refused connections).
+
+closed: requests go out as usual; consecutive block responses are counted.
+open: after BREAKER_THRESHOLD of them in a row (or at once when the site sends Retry-After)
+the site is skipped until the cooldown passes. Cooldowns double with every trip in a row,
+from BREAKER_COOLDOWN up to BREAKER_MAX_COOLDOWN, and are never shorter than Retry-After.
+half_open: the first run after the cooldown is a probe. Any success closes the breaker;
+a block reopens it for the next, longer cooldown.
+
+State lives in the site_breaker table, so cron runs and daemon threads share it.
+"""
+import os
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+
+from storage import load_breaker, save_breaker
+
+THRESHOLD = int(os.getenv("BREAKER_THRESHOLD", "3") or 3)
+COOLDOWN = int(os.getenv("BREAKER_COOLDOWN", "300") or 300)
+MAX_COOLDOWN = int(os.getenv("BREAKER_MAX_COOLDOWN", "21600") or 21600)
+
+def block_status(exc: BaseException) -> Optional[int]:
+    """HTTP status if exc means the site is blocking or down (0 = no response), else None."""
+    if isinstance(exc, requests.HTTPError):
+        code = exc.response.status_code if exc.response is not None else None
+        if code is not None and (code in (403, 429) or code >= 500):
+            return code
+        return None
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return 0
+    return None
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds from the response's Retry-After header (delta or HTTP date), if any."""
+    r = getattr(exc, "response", None)
+    value = r.headers.get("Retry-After") if r is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class Breaker:
+    """One site's breaker, loaded once per run; writes only when something changes."""
+
+    def __init__(self, conn, site: str):
+        self.conn = conn
+        self.site = site
+        self.b = load_breaker(conn, site)
+
+    def remaining(self, now: Optional[float] = None) -> float:
+        """Seconds the site is still skipped for; 0 means go ahead (possibly as a probe)."""
+        now = time.time() if now is None else now
+        if self.b["state"] != "open":
+            return 0.0
+        if now < self.b["open_until"]:
+            return self.b["open_until"] - now
+        self.b["state"] = "half_open"
+        save_breaker(self.conn, self.site, self.b)
+        return 0.0
+
+    def failure(self, status: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """Count a block response; returns the cooldown if this one opened the breaker."""
+        b = self.b
+        if b["state"] == "open":
+            return None  # already tripped this run; in-flight stragglers don't extend it
+        b["failures"] += 1
+        b["last_status"] = status
+        cooldown = None
+        if b["state"] == "half_open" or b["failures"] >= THRESHOLD or retry_after is not None:
+            b["trips"] += 1
+            cooldown = min(MAX_COOLDOWN, max(retry_after or 0, COOLDOWN * 2 ** (b["trips"] - 1)))
+            b["state"], b["open_until"], b["failures"] = "open", time.time() + cooldown, 0
+        save_breaker(self.conn, self.site, b)
+        return cooldown
+
+    def success(self) -> bool:
+        """Reset the failure count; True if this closed a breaker that had been open."""
+        b = self.b
+        if b["state"] == "open" or (b["state"] == "closed" and not b["failures"]):
+            return False  # open: a straggler from the run that tripped it proves nothing
+        closed = b["state"] == "half_open"
+        b.update(state="closed", failures=0, trips=0, open_until=0.0)
+        save_breaker(self.conn, self.site, b)
+        return closed
@@ -0,0 +1,136 @@
+"""
+Cross-site duplicate detection for the same promotion listed on several aggregators.
+Only posts from another site (post URL host) are candidates; a site re-listing a
+promotion under a new URL is a new post.
+
+Two signals, both indexed in the DB so a lookup touches a handful of rows no matter how
+big posts gets:
+  * entry_key: the entry link's host + path (no scheme, www., query or trailing slash);
+    an exact match means the same sponsor page.
+  * a MinHash signature of the title's content words, split into LSH bands that live in
+    post_bands; posts sharing a band are candidates, confirmed by signature similarity
+    plus the same deadline day. Titles are short once the stopwords are gone ("Gift Card
+    Giveaway" and "Win a Gift Card" look the same), so a title with fewer than
+    TITLE_MIN_WORDS content words gets no signature, and without both deadlines a title
+    match only counts against a post seen in the last TITLE_UNDATED_HOURS.
+"""
+import hashlib
+import random
+import re
+import os
+import struct
+from datetime import datetime, timedelta
+from typing import List, Optional
+from urllib.parse import urlparse
+
+NUM_PERM = 36
+BANDS = 12
+ROWS = NUM_PERM // BANDS
+TITLE_THRESHOLD = 0.8
+TITLE_MIN_WORDS = 3
+TITLE_UNDATED_HOURS = int(os.getenv("DEDUP_UNDATED_HOURS", "48") or 48)
+
+# Hosts that never identify a promotion on their own: the aggregators themselves, and the
+# social profiles their page chrome links to (parsers fall back to those when a post has
+# no entry link of its own).
+_AGGREGATORS = ("sweepstakesfanatics.com", "sweepstakestoday.com", "freebieshark.com")
+_SOCIAL = ("facebook.com", "twitter.com", "x.com", "instagram.com", "pinterest.com",
+           "youtube.com", "tiktok.com", "linkedin.com")
+
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "for", "in", "on", "at", "with", "your", "you",
+    "win", "wins", "winning", "enter", "entry", "sweepstakes", "sweepstake", "sweeps",
+    "giveaway", "contest", "instant", "instantwin", "game", "promotion", "promo", "chance",
+}
+
+_P = (1 << 61) - 1
+_rng = random.Random(0x5eed)
+_PERMS = [(_rng.randrange(1, _P), _rng.randrange(0, _P)) for _ in range(NUM_PERM)]
+
+def _host(p) -> str:
+    host = (p.hostname or "").lower()
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    return host
+
+def site_host(url: Optional[str]) -> str:
+    """Host of a post URL without www./m., i.e. which site listed it."""
+    return _host(urlparse((url or "").strip()))
+
+def entry_key(url: Optional[str]) -> Optional[str]:
+    if not url:
+        return None
+    p = urlparse(url.strip())
+    host = _host(p)
+    path = re.sub(r"/+", "/", p.path or "").rstrip("/").lower()
+    # a bare domain (homepage, social profile root) is too coarse to call two posts the same
+    if not host or not path or any(host == h or host.endswith("." + h) for h in _AGGREGATORS + _SOCIAL):
+        return None
+    return f"{host}{path}"
+
+def _tokens(title: str) -> List[str]:
+    t = title.lower().replace("&", " and ")
+    t = re.sub(r"(?<=\d),(?=\d{3})", "", t)  # $1,000 -> 1000
+    return [w for w in re.findall(r"[a-z0-9]+", t) if w not in _STOPWORDS]
+
+def _shingles(title: str) -> List[str]:
+    words = _tokens(title)
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+def signature(title: Optional[str]) -> Optional[bytes]:
+    """
+    MinHash over title unigrams+bigrams, packed as NUM_PERM uint32s; None if the title has
+    fewer than TITLE_MIN_WORDS content words (too little to tell promotions apart).
+    """
+    words = _tokens(title or "")
+    if len(set(words)) < TITLE_MIN_WORDS:
+        return None
+    sh = set(_shingles(title or ""))
+    base = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in sh]
+    mins = [min(((a * x + b) % _P) & 0xFFFFFFFF for x in base) for a, b in _PERMS]
+    return struct.pack(f">{NUM_PERM}I", *mins)
+
+def bands(sig: Optional[bytes]) -> List[int]:
+    """LSH band keys (signed 64-bit, SQLite INTEGER friendly)."""
+    if not sig:
+        return []
+    step = ROWS * 4
+    return [
+        int.from_bytes(hashlib.blake2b(bytes([i]) + sig[i * step:(i + 1) * step], digest_size=8).digest(),
+                       "big", signed=True)
+        for i in range(BANDS)
+    ]
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity of the two titles' shingle sets."""
+    va = struct.unpack(f">{NUM_PERM}I", a)
+    vb = struct.unpack(f">{NUM_PERM}I", b)
+    return sum(1 for x, y in zip(va, vb) if x == y) / NUM_PERM
+
+def _title_window(a_iso: Optional[str], b_iso: Optional[str], b_created: Optional[str]) -> bool:
+    # both deadlines known: same UTC day; otherwise only a post from the last few hours
+    # (created_at_utc, SQLite CURRENT_TIMESTAMP) can be the same promotion
+    if a_iso and b_iso:
+        return a_iso[:10] == b_iso[:10]
+    try:
+        created = datetime.strptime((b_created or "")[:19], "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return False
+    return datetime.utcnow() - created <= timedelta(hours=TITLE_UNDATED_HOURS)
+
+def find_duplicate(conn, url: str, key: Optional[str], sig: Optional[bytes],
+                   deadline_iso: Optional[str]) -> Optional[str]:
+    """Id of an earlier post from another site for the same promotion, or None. url is the new post's URL."""
+    from storage import dedup_candidates
+
+    host = site_host(url)
+    for pid, c_url, c_key, c_sig, c_deadline, c_created in dedup_candidates(conn, key, bands(sig)):
+        if site_host(c_url) == host:
+            continue
+        if key and c_key == key:
+            return pid
+        if (sig and c_sig and similarity(sig, c_sig) >= TITLE_THRESHOLD
+                and _title_window(deadline_iso, c_deadline, c_created)):
+            return pid
+    return None
@@ -1,7 +1,11 @@
-import requests
 import os
+import time
+import threading
+from collections import deque
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+
+import metrics
 
 def _cap(s: str, n: int) -> str:
     s = s or ""
@@ -29,6 +33,23 @@ def build_error_embed(site_key: str, stage: str, err_msg: str, details: str = ""
         "footer": {"text": "Sweepstakes Radar • Alert"},
     }
 
+def build_notice_embed(site_key: str, stage: str, msg: str) -> dict:
+    """
+    Green all-clear embed (e.g. a site's circuit breaker closing again).
+    """
+    return {
+        "title": "✅ sweeps-bot recovered",
+        "description": "\n".join([
+            f"**Site:** {site_key}",
+            f"**Stage:** {stage}",
+            f"**When:** {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%SZ')} UTC",
+            "",
+            _cap(msg, 1900),
+        ]),
+        "color": 0x52C41A,  # green
+        "footer": {"text": "Sweepstakes Radar • Alert"},
+    }
+
 def send_alert(webhook_url: str, embeds):
     """
     Post one or more alert embeds to the alert webhook (no mentions).
@@ -110,9 +131,159 @@ def build_embed(item: dict) -> dict:
 
     return embed
 
+# Discord limits per webhook message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_CHARS_PER_MESSAGE = 6000
+
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "12") or 12)
+
+def _embed_chars(e: Dict) -> int:
+    """Characters Discord counts toward the 6000 per-message total."""
+    n = len(e.get("title") or "") + len(e.get("description") or "")
+    n += sum(len(f.get("name") or "") + len(f.get("value") or "") for f in e.get("fields") or [])
+    n += len((e.get("footer") or {}).get("text") or "") + len((e.get("author") or {}).get("name") or "")
+    return n
+
+def pack_embeds(embeds: List[Dict]) -> List[List[int]]:
+    """Group embed indexes into messages of at most 10 embeds / 6000 characters, in order."""
+    batches: List[List[int]] = []
+    cur: List[int] = []
+    chars = 0
+    for i, e in enumerate(embeds):
+        n = _embed_chars(e)
+        if cur and (len(cur) >= MAX_EMBEDS_PER_MESSAGE or chars + n > MAX_CHARS_PER_MESSAGE):
+            batches.append(cur)
+            cur, chars = [], 0
+        cur.append(i)
+        chars += n
+    if cur:
+        batches.append(cur)
+    return batches
+
+class _Bucket:
+    """Rate-limit state for one webhook, from X-RateLimit-* headers and 429 bodies."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+
+_BUCKETS: Dict[str, _Bucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+_session = None
+
+def _bucket(webhook_url: str) -> _Bucket:
+    with _BUCKETS_LOCK:
+        b = _BUCKETS.get(webhook_url)
+        if b is None:
+            b = _BUCKETS[webhook_url] = _Bucket()
+        return b
+
+def _http():
+    global _session
+    if _session is None:
+        import requests  # deferred: runs with nothing to post never need it
+        _session = requests.Session()
+    return _session
+
+def _retry_after(r) -> float:
+    try:
+        return float(r.json().get("retry_after", 1.5))
+    except Exception:
+        try:
+            return float(r.headers.get("Retry-After", 1.5))
+        except (TypeError, ValueError):
+            return 1.5
+
+def _post(webhook_url: str, payload: Dict, max_429: int = 5):
+    """
+    POST one message, waiting out the webhook's bucket first. 429s are retried after
+    retry_after (up to max_429 times); any other response is returned to the caller.
+    """
+    b = _bucket(webhook_url)
+    for _ in range(max_429 + 1):
+        with b.lock:
+            wait = b.reset_at - time.time() if b.remaining == 0 else 0
+            if wait > 0:
+                time.sleep(wait)
+            with metrics.timer("webhook_post"):
+                r = _http().post(webhook_url, json=payload, timeout=20)
+            metrics.incr("webhook_responses", status=r.status_code)
+            h = r.headers
+            if h.get("X-RateLimit-Remaining") is not None:
+                try:
+                    b.remaining = int(h["X-RateLimit-Remaining"])
+                    b.reset_at = time.time() + float(h.get("X-RateLimit-Reset-After", 1))
+                except ValueError:
+                    b.remaining = None
+            if r.status_code != 429:
+                return r
+            b.remaining = 0
+            b.reset_at = time.time() + _retry_after(r)
+            print(f"[webhook] 429, retry after {b.reset_at - time.time():.2f}s")
+    return r
+
 def send_webhook(webhook_url: str, embeds: List[Dict]):
-    # Discord: max 10 embeds per request
-    for i in range(0, len(embeds), 10):
-        payload = {"embeds": embeds[i:i+10]}
-        r = requests.post(webhook_url, json=payload, timeout=20)
+    """Post embeds directly (no queue), packed and rate-limit aware; raises on failure."""
+    for idx in pack_embeds(embeds):
+        r = _post(webhook_url, {"embeds": [embeds[i] for i in idx]})
         r.raise_for_status()
+
+_OUTBOX_LOCKS: Dict[str, threading.Lock] = {}
+
+def _outbox_lock(webhook_url: str) -> threading.Lock:
+    # site threads sharing DISCORD_WEBHOOK_URL drain it one at a time
+    with _BUCKETS_LOCK:
+        return _OUTBOX_LOCKS.setdefault(webhook_url, threading.Lock())
+
+def _backoff(attempts: int) -> float:
+    return min(30.0 * (2 ** attempts), 3600.0)
+
+def deliver_outbox(conn, webhook_url: str) -> Tuple[int, int, Optional[str]]:
+    """
+    Drain due outbox rows for one webhook (see storage.claim_outbox). Rows are marked
+    delivered only after a 2xx. A 4xx on a multi-embed message is retried one embed at a
+    time so a single bad embed can't block the others. 5xx, network errors and exhausted
+    429s reschedule the rest of the claim with exponential backoff; rows that keep failing
+    are parked as 'dead' after OUTBOX_MAX_ATTEMPTS. Returns (delivered, failed, last_error).
+    """
+    from storage import claim_outbox, mark_delivered, mark_retry
+
+    delivered = failed = 0
+    last_error = None
+    with _outbox_lock(webhook_url):
+        while True:
+            rows = claim_outbox(conn, webhook_url)
+            if not rows:
+                break
+            embeds = [r[1] for r in rows]
+            queue = deque(pack_embeds(embeds))
+            stop = False
+            while queue:
+                idx = queue.popleft()
+                ids = [rows[i][0] for i in idx]
+                try:
+                    r = _post(webhook_url, {"embeds": [embeds[i] for i in idx]})
+                    status, err = r.status_code, f"HTTP {r.status_code}: {_cap(r.text, 300)}"
+                except Exception as e:
+                    status, err = None, f"{type(e).__name__}: {e}"
+                if status is not None and 200 <= status < 300:
+                    mark_delivered(conn, ids)
+                    delivered += len(ids)
+                    continue
+                last_error = err
+                rejected = status is not None and 400 <= status < 500 and status != 429
+                if rejected and len(idx) > 1:
+                    queue.extendleft([i] for i in reversed(idx))
+                    continue
+                mark_retry(conn, ids, err, _backoff(max(rows[i][2] for i in idx)), OUTBOX_MAX_ATTEMPTS)
+                failed += len(ids)
+                if rejected:
+                    continue  # this embed was refused; the rest can still go
+                stop = True
+                break
+            if stop:
+                rest = [rows[i][0] for batch in queue for i in batch]
+                mark_retry(conn, rest, "not attempted: earlier message failed", 30.0,
+                           OUTBOX_MAX_ATTEMPTS, count_attempt=False)
+                break
+    return delivered, failed, last_error
@@ -0,0 +1,84 @@
+"""
+Parsed detail items kept in the DB (item_cache table) so a page isn't parsed twice.
+
+Rows are keyed by canonical URL and hold the item plus a hash of the body it was parsed
+from. Within ITEM_CACHE_TTL seconds the stored item is used as is, without a request, so
+URLs retried after a failed, cancelled or breaker-stopped run cost nothing. After that the
+page is fetched again; if its body hash still matches, the stored item is reused instead
+of parsing. Old rows are dropped by maintenance (ITEM_CACHE_KEEP_DAYS).
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import metrics
+from storage import load_items, save_items
+
+TTL = int(os.getenv("ITEM_CACHE_TTL", "21600") or 21600)
+
+# query parameters that never change the page
+_TRACKING = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+def canonical_url(url: str) -> str:
+    """Lowercased scheme and host, no fragment, tracking parameters or trailing slash."""
+    p = urlparse(url.strip())
+    query = sorted((k, v) for k, v in parse_qsl(p.query, keep_blank_values=True)
+                   if not k.lower().startswith(_TRACKING))
+    return urlunparse((p.scheme.lower(), p.netloc.lower(), p.path.rstrip("/") or "/", "",
+                       urlencode(query), ""))
+
+def body_hash(body: str) -> str:
+    return hashlib.sha1(body.encode("utf-8", "surrogatepass")).hexdigest()
+
+class ItemCache:
+    """
+    One site run's view of the cache. load() and save() use the run's DB connection, on
+    its thread; fresh(), unchanged() and put() are called from fetch threads and only
+    touch memory until the next save().
+    """
+
+    def __init__(self, conn, ttl: int = TTL):
+        self.conn = conn
+        self.ttl = ttl
+        self._rows: Dict[str, Tuple[str, dict, float]] = {}
+        self._pending: Dict[str, Tuple[str, dict, float]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, urls: Iterable[str]):
+        """Read the stored items for urls (one query), ahead of their detail fetches."""
+        keys = [k for k in dict.fromkeys(canonical_url(u) for u in urls) if k not in self._rows]
+        if not keys:
+            return
+        with metrics.timer("db", op="load_items"):
+            rows = load_items(self.conn, keys)
+        with self._lock:
+            self._rows.update(rows)
+
+    def fresh(self, url: str) -> Optional[dict]:
+        """The stored item if it is younger than the TTL (no request needed)."""
+        row = self._rows.get(canonical_url(url))
+        return row[1] if row is not None and time.time() - row[2] < self.ttl else None
+
+    def unchanged(self, url: str, h: str) -> Optional[dict]:
+        """The stored item if the page body still hashes to h; its TTL starts over."""
+        row = self._rows.get(canonical_url(url))
+        if row is None or row[0] != h:
+            return None
+        self.put(url, h, row[1])
+        return row[1]
+
+    def put(self, url: str, h: str, item: dict):
+        with self._lock:
+            self._pending[canonical_url(url)] = (h, item, time.time())
+
+    def save(self):
+        """Write the items parsed (or confirmed) since the last save."""
+        with self._lock:
+            rows, self._pending = self._pending, {}
+            self._rows.update(rows)
+        if rows:
+            with metrics.timer("db", op="save_items"):
+                save_items(self.conn, [(k, h, item, at) for k, (h, item, at) in rows.items()])
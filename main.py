@@ -1,12 +1,33 @@
+import sys
+import time
+
+_STARTED = time.perf_counter()
+if "--profile-startup" in sys.argv:
+    # must run before the imports below so they are timed too
+    import startup_profile
+    startup_profile.install(_STARTED)
+
 import os
+import random
+import signal
 import argparse
+import threading
 import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
 from datetime import timezone
-from typing import List
+from typing import Iterable, List, Iterator, Optional, Tuple
 
-from storage import get_db, seen, save
-from discord_out import build_embed, send_webhook, build_error_embed, send_alert
-from sites import list_sites, load_module, site_webhook, site_limit, site_pages
+import breaker
+import dedup
+import item_cache
+import maintenance
+import metrics
+import parse_pool
+from storage import get_db, seen_many, save_many, load_discovery, save_discovery
+from discord_out import build_embed, deliver_outbox, build_error_embed, build_notice_embed, send_alert
+from sites import (list_sites, load_module, site_webhook, site_limit, site_pages, site_catchup_pages, site_workers,
+                   site_timeout, site_interval)
+from sites.dates import stats as date_stats
 
 
 def _alert(site_key: str, stage: str, exc: Exception):
@@ -24,81 +45,553 @@ def _alert(site_key: str, stage: str, exc: Exception):
         print(f"[alert] failed to send alert: {e2}")
 
 
-def run_for_site(site_key: str, default_limit: int, default_pages: int, dry: bool):
+def _notice(site_key: str, stage: str, msg: str):
+    """Send a green all-clear embed (and print), e.g. when a site's breaker closes."""
+    alert_webhook = os.environ.get("ALERT_WEBHOOK_URL") or os.environ.get("ERROR_WEBHOOK_URL")
+    print(f"[notice] {site_key} {stage}: {msg}")
+    if not alert_webhook:
+        return
+    try:
+        send_alert(alert_webhook, [build_notice_embed(site_key, stage, msg)])
+    except Exception as e2:
+        print(f"[alert] failed to send notice: {e2}")
+
+
+def _breaker_failure(site_key: str, brk: "breaker.Breaker", status: int, exc: Exception) -> bool:
+    """Count a block response against the site's breaker; alert once and return True if it opened."""
+    metrics.incr("blocked", status=status)
+    cooldown = brk.failure(status, breaker.retry_after(exc))
+    if cooldown is None:
+        return False
+    metrics.incr("breaker_trips")
+    _alert(site_key, "circuit_breaker",
+           RuntimeError(f"site opened after HTTP {status or 'connection failure'}; skipped for {cooldown:.0f}s "
+                        f"(last error: {exc})"))
+    return True
+
+
+# Cross-site dedup checks and the save that follows run under one lock, so two site threads
+# finding the same promotion at once can't both miss each other's not-yet-saved row.
+_SAVE_LOCK = threading.Lock()
+
+# A detail page that failed (or was cut off by a cancel) is retried on later runs even
+# when the listing no longer reaches it, up to this many attempts.
+DISCOVERY_RETRIES = int(os.getenv("DISCOVERY_RETRIES", "5"))
+
+# Finished items are saved and posted at most this often (seconds) while a site's run is
+# still fetching; the first one goes out as soon as it is ready.
+STREAM_FLUSH_SECS = float(os.getenv("STREAM_FLUSH_SECS", "2") or 2)
+
+
+def _discover(mod, n: int, pages: int, known, state: dict) -> Iterator[List[str]]:
+    """Listing batches from mod.iter_recent, or all of mod.list_recent as one batch."""
+    if hasattr(mod, "iter_recent"):
+        yield from mod.iter_recent(n=n, pages=pages, known=known, state=state)
+    else:
+        yield mod.list_recent(n=n, pages=pages, known=known, state=state)
+
+
+def _parse_details(mod, batches: Iterable[List[str]], workers: int,
+                   cancel: Optional[threading.Event] = None,
+                   halt: Optional[threading.Event] = None,
+                   tick: Optional[float] = None,
+                   cache: Optional[item_cache.ItemCache] = None) -> Iterator[List[Tuple[str, Optional[dict], Optional[Exception]]]]:
+    """
+    Fetch (mod.fetch_detail) and parse (mod.parse_html) URLs as the batches come in, on a
+    bounded thread pool. Yields lists of (url, item, exc) as they complete: whatever
+    finished since the last yield, or [] after `tick` seconds with nothing new, so the
+    caller can flush on time. The next batch is pulled as soon as the current one is
+    submitted, so the first pages are being fetched while later listing pages load.
+
+    Sites with feed_item get their item from the feed entry instead when it has every
+    field. With the process pool running (--parse-workers), fetch threads hand each body
+    to it and move straight on to the next URL. With cache, an item parsed on an earlier
+    run is reused: without a request inside its TTL, else when the body hasn't changed
+    (items must have been cache.load()ed first). Politeness per host is enforced inside
+    the site's fetch (sites.throttle). Once cancel or halt (the site's breaker opened) is
+    set, URLs that have not started yet are skipped and come back as (url, None, None).
+    """
+    labels = metrics.tags()
+    remote = parse_pool.active()
+    feed_item = getattr(mod, "feed_item", None)
+
+    def cached(u: str, item: dict, stage: str):
+        metrics.incr("items", stage=stage)
+        return u, dict(item, id=mod.make_id(u), source=u), None, None  # stored under the canonical URL
+
+    def one(u: str):
+        # (url, item or process-pool Future, exc, body hash to cache the parsed item under)
+        if (cancel is not None and cancel.is_set()) or (halt is not None and halt.is_set()):
+            return u, None, None, None
+        with metrics.tagged(**labels):
+            try:
+                item = cache.fresh(u) if cache is not None else None
+                if item is not None:
+                    return cached(u, item, "cached")
+                if feed_item is not None:
+                    # the feed already carried this post's body; no request if it has every field
+                    with metrics.timer("parse_feed"):
+                        item = feed_item(u)
+                    if item is not None:
+                        metrics.incr("items", stage="from_feed")
+                        return u, item, None, None
+                with metrics.timer("fetch_detail"):
+                    body = mod.fetch_detail(u)
+                h = item_cache.body_hash(body) if cache is not None else None
+                if h is not None:
+                    item = cache.unchanged(u, h)
+                    if item is not None:
+                        return cached(u, item, "unchanged")
+                if remote:
+                    return u, parse_pool.submit(mod.__name__, u, body), None, h
+                with metrics.timer("parse_html"):
+                    return u, mod.parse_html(u, body), None, h
+            except Exception as e:
+                metrics.incr("parse_errors")
+                return u, None, e, None
+
+    def collect(results) -> List[Tuple[str, Optional[dict], Optional[Exception]]]:
+        out = []
+        for u, item, err, h in results:
+            if isinstance(item, Future):
+                try:
+                    with metrics.timer("parse_wait"):  # time spent blocked on the process pool
+                        item = item.result()
+                except Exception as e:
+                    metrics.incr("parse_errors")
+                    item, err = None, e
+            if h is not None and item is not None:
+                cache.put(u, h, item)  # on the caller's thread, so the next flush saves it
+            out.append((u, item, err))
+        return out
+
+    if workers <= 1:
+        for batch in batches:
+            for u in batch:
+                yield collect([one(u)])
+        return
+    pending = set()
+
+    def ready(timeout: Optional[float]):
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        pending.difference_update(done)
+        return collect(f.result() for f in done)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="detail") as pool:
+        for batch in batches:
+            pending.update(pool.submit(one, u) for u in batch)
+            results = ready(0)
+            if results:
+                yield results
+        while pending:
+            yield ready(tick)
+
+
+def run_for_site(site_key: str, default_limit: int, default_pages: int, dry: bool, default_workers: int = 4,
+                 cancel: Optional[threading.Event] = None, conn=None, default_catchup: int = 10) -> bool:
+    """
+    One discovery/parse/post pass for a site. Returns False when discovery itself failed
+    (already alerted), True otherwise. conn lets the daemon reuse a warm DB connection.
+
+    The pass is a pipeline: detail pages are fetched as soon as their listing page is read,
+    and finished items are saved and posted in small batches (at most every
+    STREAM_FLUSH_SECS) while the rest are still in flight, so the first new post reaches
+    Discord without waiting for the whole run.
+
+    A site whose circuit breaker is open (see breaker.py) is skipped; block responses
+    (403/429/5xx) count toward opening it and are alerted once per trip, not per URL.
+
+    Listing stops at the first page holding a post we already have. Once a site has
+    discovery state (it has run before), that may take up to default_catchup pages
+    (<SITE>_CATCHUP_PAGES) and limit URLs per page, so a run after downtime catches up.
+    """
     mod = load_module(site_key)
     webhook = site_webhook(site_key)
     db_path = os.environ.get("DB_PATH", "data.db")
 
     limit = site_limit(site_key, default_limit)
     pages = site_pages(site_key, default_pages)
+    workers = site_workers(site_key, default_workers)
 
-    print(f"\n===== [{site_key}] DB_PATH={db_path} webhook? {'yes' if bool(webhook) else 'NO'} limit={limit} pages={pages}")
+    print(f"\n===== [{site_key}] DB_PATH={db_path} webhook? {'yes' if bool(webhook) else 'NO'} limit={limit} pages={pages} workers={workers}")
     if not webhook and not dry:
         raise RuntimeError(
             f"No webhook for site {site_key}. Set {site_key.upper()}_WEBHOOK_URL or DISCORD_WEBHOOK_URL."
         )
 
-    conn = get_db(db_path)
+    if conn is None:
+        conn = get_db(db_path)
 
-    # list_recent with protection
+    brk = breaker.Breaker(conn, site_key)
+    wait_s = brk.remaining()
+    if wait_s > 0:
+        print(f"[{site_key}] circuit breaker open; skipping for another {wait_s:.0f}s")
+        metrics.incr("breaker_skips")
+        return True
+
+    state = load_discovery(conn, site_key)
+    n = limit
+    if state is not None:
+        depth = max(pages, site_catchup_pages(site_key, default_catchup))
+        n, pages = limit * depth, depth
+    state = state or {}
+    last_url = state.get("last_url")
+    retry = state.get("retry") or {}
+    done = set()  # ids that got a posts row this run
+    cache = item_cache.ItemCache(conn)
+
+    def is_known(page_urls: List[str]):
+        # posts saved earlier in this run don't count: the listing may still be on their page
+        page_ids = {u: mod.make_id(u) for u in page_urls}
+        with metrics.timer("db", op="seen_many"):
+            hit = seen_many(conn, page_ids.values()) - done
+        return {u for u in page_urls if page_ids[u] in hit or u == last_url}
+
+    def list_failed(e: Exception):
+        metrics.incr("list_errors")
+        status = breaker.block_status(e)
+        if status is None:
+            _alert(site_key, "list_recent", e)
+        elif _breaker_failure(site_key, brk, status, e):
+            tripped.set()
+        else:
+            print(f"[{site_key}] list_recent blocked ({status or 'no response'}): {e}")
+
+    tripped = threading.Event()  # breaker opened mid-run: stop starting detail fetches
+
+    def stopped() -> bool:
+        return tripped.is_set() or (cancel is not None and cancel.is_set())
+
+    # the first listing page is read up front: a failing listing ends the run as before
+    batches = _discover(mod, n, pages, is_known, state)
     try:
-        urls: List[str] = mod.list_recent(n=limit, pages=pages)
+        with metrics.timer("list_recent"):
+            first = next(batches, None)
     except Exception as e:
-        _alert(site_key, "list_recent", e)
-        return
+        list_failed(e)
+        return False
+    if brk.success():
+        _notice(site_key, "circuit_breaker", "site closed; listing reachable again")
+    if first:
+        state["last_url"] = first[0]
+
+    ids = {}  # url -> post id, for everything discovered or retried this run
+    todo: List[str] = []  # the unseen ones, handed to the detail stage
+    known_ids = set()
+    discovery_ok = [True]
+
+    def unseen(batch: List[str]) -> List[str]:
+        # ids are derived from the URL, so drop known posts before any detail fetch
+        batch_ids = {u: mod.make_id(u) for u in batch if u not in ids}
+        ids.update(batch_ids)
+        with metrics.timer("db", op="seen_many"):
+            known = seen_many(conn, batch_ids.values())
+        metrics.incr("items", len(known), stage="known")
+        known_ids.update(known)
+        fresh_urls = [u for u, pid in batch_ids.items() if pid not in known]
+        if known:
+            print(f"[{site_key}] skip {len(known)} already seen; {len(fresh_urls)} to fetch")
+        todo.extend(fresh_urls)
+        cache.load(fresh_urls)
+        return fresh_urls
 
-    print(f"[{site_key}] discovered {len(urls)} urls")
+    def to_fetch() -> Iterator[List[str]]:
+        batch = first
+        while batch is not None:
+            print(f"[{site_key}] discovered {len(batch)} urls")
+            metrics.incr("items", len(batch), stage="discovered")
+            yield unseen(batch)
+            if stopped():
+                break
+            try:
+                with metrics.timer("list_recent"):
+                    batch = next(batches, None)
+            except Exception as e:
+                discovery_ok[0] = False
+                list_failed(e)  # what was found so far still goes through
+                break
+        batches.close()
+        if retry and not stopped():
+            print(f"[{site_key}] retrying {len(retry)} url(s) that failed on earlier runs")
+            yield unseen([u for u in retry if u not in ids])
 
-    embeds = []
-    new_count = 0
+    stats = {"new": 0, "saved": 0, "queued": 0}
+    deliveries = {"delivered": 0, "failed": 0, "error": None}
 
-    for u in urls:
-        # parse_detail protected per URL
+    def flush(fresh: List[dict], final: bool = False):
+        embeds = []  # (post_id, embed), queued in the outbox with the rows below
+        rows = []
+        dedup_rows = []
+        new_count = 0
+        with _SAVE_LOCK:
+            cache.save()
+            for item in fresh:
+                u = item["source"]
+                deadline_iso = item["end_date"].astimezone(timezone.utc).isoformat() if item.get("end_date") else None
+                key = dedup.entry_key(item.get("entry_link"))
+                sig = dedup.signature(item.get("title"))
+                with metrics.timer("db", op="find_duplicate"):
+                    dup_of = dedup.find_duplicate(conn, u, key, sig, deadline_iso)
+                # duplicates are still saved (so their URL counts as seen) but not posted again
+                rows.append((item["id"], u, item["title"], deadline_iso))
+                dedup_rows.append((item["id"], key, sig, dup_of, dedup.bands(sig), deadline_iso))
+                if dup_of:
+                    print(f"[{site_key}] duplicate of {dup_of} -> {item['title']} -> {u}")
+                    continue
+
+                new_count += 1
+                print(f"[{site_key}] new -> {item['title']} -> {u}")
+                if not dry:
+                    try:
+                        embeds.append((item["id"], build_embed(item)))
+                    except Exception as e:
+                        _alert(site_key, f"build_embed({u})", e)
+
+            # one transaction per batch: posts rows + their queued embeds + dedup index
+            if rows:
+                with metrics.timer("db", op="save_many"):
+                    save_many(conn, rows, outbox=[(webhook, site_key, pid, e) for pid, e in embeds],
+                              dedup=[r[:5] for r in dedup_rows])
+        metrics.incr("items", new_count, stage="new")
+        metrics.incr("items", len(rows) - new_count, stage="duplicate")
+        done.update(r[0] for r in rows)
+        stats["new"] += new_count
+        stats["saved"] += len(rows)
+        stats["queued"] += len(embeds)
+
+        # the final flush also drains anything left over from earlier failed deliveries
+        if dry or not (embeds or final):
+            return
         try:
-            item = mod.parse_detail(u)
+            with metrics.timer("deliver_outbox"):
+                delivered, failed, last_error = deliver_outbox(conn, webhook)
         except Exception as e:
-            _alert(site_key, f"parse_detail({u})", e)
-            continue
+            deliveries["failed"] += len(embeds)
+            deliveries["error"] = f"{type(e).__name__}: {e}"
+            return
+        metrics.incr("embeds", delivered, result="delivered")
+        metrics.incr("embeds", failed, result="failed")
+        if delivered or failed:
+            print(f"[{site_key}] posted {delivered} embeds" + (f", {failed} queued for retry" if failed else ""))
+        deliveries["delivered"] += delivered
+        deliveries["failed"] += failed
+        deliveries["error"] = last_error or deliveries["error"]
 
-        if seen(conn, item["id"]):
-            print(f"[{site_key}] skip seen -> {u}")
-            continue
+    fresh: List[dict] = []
+    seen_ids = set()
+    attempted = set()  # URLs that came back with an item or an error (not skipped)
+    last_flush = 0.0  # the first finished item goes out right away
 
-        new_count += 1
-        print(f"[{site_key}] new -> {item['title']} -> {u}")
+    for results in _parse_details(mod, to_fetch(), workers, cancel, tripped, tick=STREAM_FLUSH_SECS, cache=cache):
+        if cancel is not None and cancel.is_set():
+            print(f"[{site_key}] cancelled; keeping {stats['saved'] + len(fresh)} items found so far")
+            break
+        for u, item, err in results:
+            # parse_detail protected per URL
+            if err is not None or item is not None:
+                attempted.add(u)
+            if err is not None:
+                status = breaker.block_status(err)
+                if status is None:
+                    _alert(site_key, f"parse_detail({u})", err)
+                else:
+                    print(f"[{site_key}] blocked ({status or 'no response'}) -> {u}")
+                    if _breaker_failure(site_key, brk, status, err):
+                        print(f"[{site_key}] circuit breaker open; remaining detail pages wait for a later run")
+                        tripped.set()
+                continue
+            if item is None:
+                continue  # skipped after the breaker opened or a cancel; retried on a later run
+            brk.success()
 
-        if not dry:
-            try:
-                embeds.append(build_embed(item))
-            except Exception as e:
-                _alert(site_key, f"build_embed({u})", e)
+            if item["id"] in known_ids or item["id"] in seen_ids:
+                print(f"[{site_key}] skip seen -> {u}")
+                continue
+            seen_ids.add(item["id"])
+            fresh.append(item)
+        if fresh and time.monotonic() - last_flush >= STREAM_FLUSH_SECS:
+            flush(fresh)
+            fresh = []
+            last_flush = time.monotonic()
+    flush(fresh, final=True)
 
-        deadline_iso = item["end_date"].astimezone(timezone.utc).isoformat() if item.get("end_date") else None
-        save(conn, item["id"], item["source"], item["title"], deadline_iso)
+    # whatever didn't get a posts row this time is retried next run, wherever the listing stops;
+    # only URLs actually fetched this run use up a retry, skipped ones keep their count
+    tries = {u: n for u, n in retry.items() if u not in ids}  # never reached (breaker, cancel)
+    tries.update((u, retry.get(u, 0) + (1 if u in attempted else 0)) for u in todo if ids[u] not in done)
+    state["retry"] = {u: t for u, t in tries.items() if t <= DISCOVERY_RETRIES}
+    save_discovery(conn, site_key, state)
 
     if dry:
-        print(f"[{site_key}] [dry] would post {len(embeds)} embeds (new={new_count})")
-        return
+        print(f"[{site_key}] [dry] would post {stats['new']} embeds (new={stats['new']})")
+        return discovery_ok[0]
+    if not stats["queued"]:
+        print(f"[{site_key}] nothing new to post.")
+    if deliveries["failed"]:
+        _alert(site_key, "send_webhook",
+               RuntimeError(f"{deliveries['failed']} embeds queued for retry; last error: {deliveries['error']}"))
+    return discovery_ok[0]
+
 
-    if embeds:
-        print(f"[{site_key}] posting {len(embeds)} embeds...")
+def _run_site_guarded(site_key: str, cancel: threading.Event, **kw) -> bool:
+    with metrics.tagged(site=site_key), metrics.timer("site_run"):
         try:
-            send_webhook(webhook, embeds)
-            print(f"[{site_key}] posted.")
+            return run_for_site(site_key, cancel=cancel, **kw)
         except Exception as e:
-            _alert(site_key, "send_webhook", e)
-    else:
-        print(f"[{site_key}] nothing new to post.")
+            _alert(site_key, "run_for_site", e)
+            return False
+
+
+def _write_metrics(json_path: Optional[str], prom_path: Optional[str]):
+    try:
+        if json_path:
+            metrics.write_json(json_path, extra={"dates": date_stats()})
+        if prom_path:
+            metrics.write_prom(prom_path)
+    except Exception as e:
+        print(f"[metrics] could not write metrics: {e}")
+
+
+def _pool_modules(target_sites: List[str]) -> List[str]:
+    """Module names for the parse pool to warm; a key that won't load is left out and
+    alerts from its own site run, like it does without workers."""
+    names = []
+    for s in target_sites:
+        try:
+            names.append(load_module(s).__name__)
+        except Exception as e:
+            print(f"[parse_pool] skipping {s}: {type(e).__name__}: {e}")
+    return names
+
+
+def _cancel_overrun(site_key: str, cancel: threading.Event, timeout: int):
+    cancel.set()
+    _alert(site_key, "run_for_site", TimeoutError(f"site exceeded its {timeout}s deadline; cancelled"))
+
+
+def run_sites(target_sites: List[str], default_timeout: int, **kw):
+    """
+    Run every site on its own thread so one slow or blocked site doesn't hold up the rest.
+    Each site gets its own deadline (<SITE>_TIMEOUT or default_timeout seconds); a site that
+    overruns is alerted and told to stop, and we stop waiting for it.
+    """
+    if not target_sites:
+        return
+    started = time.monotonic()
+    cancels = {s: threading.Event() for s in target_sites}
+    pool = ThreadPoolExecutor(max_workers=len(target_sites), thread_name_prefix="site")
+    futures = {s: pool.submit(_run_site_guarded, s, cancels[s], **kw) for s in target_sites}
+
+    by_deadline = sorted(target_sites, key=lambda s: site_timeout(s, default_timeout))
+    for s in by_deadline:
+        timeout = site_timeout(s, default_timeout)
+        try:
+            futures[s].result(timeout=max(0.0, started + timeout - time.monotonic()))
+        except FutureTimeout:
+            _cancel_overrun(s, cancels[s], timeout)
+
+    # Cancelled sites wind down on their own (in-flight requests are bounded by their timeouts).
+    pool.shutdown(wait=False)
+    print(f"\n[run] {len(target_sites)} site(s) in {time.monotonic() - started:.1f}s; dates {date_stats()}")
+
+
+def _site_loop(site_key: str, stop: threading.Event, active: dict, default_interval: int, jitter: float,
+               max_backoff: int, default_timeout: int, metrics_out: Tuple[Optional[str], Optional[str]] = (None, None),
+               **kw):
+    """
+    Daemon loop for one site, on its own thread: run, then sleep for the site's interval
+    (jittered), or for an exponentially growing backoff after failed runs. The thread keeps
+    one DB connection for its whole life; HTTP sessions and parse caches are process-wide.
+    Periodic DB maintenance piggybacks on whichever site thread finds it due; metrics files
+    (cumulative for the process) are rewritten after every run.
+    """
+    conn = get_db(os.environ.get("DB_PATH", "data.db"))
+    interval = site_interval(site_key, default_interval)
+    timeout = site_timeout(site_key, default_timeout)
+    failures = 0
+
+    # stagger the first tick so sites don't all hit the network at once
+    stop.wait(random.uniform(0, min(10.0, interval * jitter)))
+    while not stop.is_set():
+        cancel = threading.Event()
+        active[site_key] = cancel
+        timer = threading.Timer(timeout, _cancel_overrun, args=(site_key, cancel, timeout))
+        timer.daemon = True
+        timer.start()
+        try:
+            ok = _run_site_guarded(site_key, cancel, conn=conn, **kw)
+        finally:
+            timer.cancel()
+            active.pop(site_key, None)
+        if stop.is_set():
+            break
+        maintenance.maybe_run(conn)
+        _write_metrics(*metrics_out)
+
+        if ok and not cancel.is_set():
+            failures = 0
+            delay = interval
+        else:
+            failures += 1
+            delay = min(interval * (2 ** failures), max_backoff)
+        delay *= random.uniform(1 - jitter, 1 + jitter)
+        print(f"[{site_key}] next run in {delay:.0f}s" + (f" (backoff, {failures} failure(s))" if failures else ""))
+        stop.wait(delay)
+    conn.close()
+
+
+def run_daemon(target_sites: List[str], default_interval: int, jitter: float, max_backoff: int,
+               default_timeout: int, metrics_out: Tuple[Optional[str], Optional[str]] = (None, None), **kw):
+    """Keep polling every site on its own schedule until SIGTERM/SIGINT."""
+    stop = threading.Event()
+    active: dict = {}  # site -> cancel event of the run in progress
+
+    def _shutdown(signum, frame):
+        print(f"\n[daemon] signal {signum}: finishing in-flight work and exiting")
+        stop.set()
+        for ev in list(active.values()):
+            ev.set()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+
+    threads = [
+        threading.Thread(target=_site_loop, name=f"daemon-{s}", args=(s, stop, active, default_interval, jitter,
+                                                                        max_backoff, default_timeout, metrics_out), kwargs=kw)
+        for s in target_sites
+    ]
+    for t in threads:
+        t.start()
+    print(f"[daemon] polling {', '.join(target_sites)} (default interval {default_interval}s)")
+    while any(t.is_alive() for t in threads):
+        for t in threads:
+            t.join(timeout=1.0)
+    print("[daemon] stopped")
 
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
-    ap.add_argument("--mode", choices=["recent", "dry"], default="recent")
+    ap.add_argument("--mode", choices=["recent", "dry", "daemon", "maintain"], default="recent",
+                    help="daemon: stay running and poll each site on its own interval; maintain: archive/vacuum the DB now")
     ap.add_argument("--sites", default="all", help="Comma list or 'all'. e.g. fanatics,stoday,freebieshark")
     ap.add_argument("--site", help="(back-compat) single site or 'both'")
     ap.add_argument("--limit", type=int, default=12)
-    ap.add_argument("--pages", type=int, default=3)
+    ap.add_argument("--pages", type=int, default=3, help="Listing pages on a site's first run (later runs stop at known posts)")
+    ap.add_argument("--catchup-pages", type=int, default=10,
+                    help="Deepest listing page later runs may walk to reach known posts (override with <SITE>_CATCHUP_PAGES)")
+    ap.add_argument("--workers", type=int, default=4, help="Concurrent detail fetches per site (per-host politeness still applies)")
+    ap.add_argument("--parse-workers", type=int, default=0,
+                    help="Parse pages in this many warm worker processes (0 = parse on the fetch threads)")
+    ap.add_argument("--site-timeout", type=int, default=300, help="Per-site deadline in seconds (override with <SITE>_TIMEOUT)")
+    ap.add_argument("--interval", type=int, default=600, help="(daemon) Seconds between runs per site (override with <SITE>_INTERVAL)")
+    ap.add_argument("--jitter", type=float, default=0.1, help="(daemon) +/- fraction applied to every sleep")
+    ap.add_argument("--max-backoff", type=int, default=3600, help="(daemon) Cap in seconds for the post-failure backoff")
+    ap.add_argument("--metrics-json", metavar="PATH", help="Write a JSON timing/counter summary ('-' for stdout); rewritten after each daemon run")
+    ap.add_argument("--metrics-prom", metavar="PATH", help="Write metrics in Prometheus text format (node_exporter textfile collector)")
+    ap.add_argument("--profile-startup", action="store_true", help="Report import timings (and which heavy deps loaded) at exit")
     args = ap.parse_args()
+    if args.profile_startup:
+        print(f"[startup] ready to run in {(time.perf_counter() - _STARTED)*1000:.0f}ms")
 
     # Back-compat shim for older --site flag
     if args.site:
@@ -106,8 +599,28 @@ if __name__ == "__main__":
     else:
         target_sites = list_sites() if args.sites == "all" else [s.strip() for s in args.sites.split(",") if s.strip()]
 
-    for s in target_sites:
-        try:
-            run_for_site(s, default_limit=args.limit, default_pages=args.pages, dry=(args.mode == "dry"))
-        except Exception as e:
-            _alert(s, "run_for_site", e)
+    if args.mode != "maintain" and args.parse_workers > 0:
+        parse_pool.start(args.parse_workers, _pool_modules(target_sites))
+
+    if args.mode == "maintain":
+        conn = get_db(os.environ.get("DB_PATH", "data.db"))
+        maintenance.run(conn)
+        conn.close()
+    elif args.mode == "daemon":
+        run_daemon(target_sites, default_interval=args.interval, jitter=args.jitter, max_backoff=args.max_backoff,
+                   default_timeout=args.site_timeout, metrics_out=(args.metrics_json, args.metrics_prom),
+                   default_limit=args.limit, default_pages=args.pages, dry=False, default_workers=args.workers,
+                   default_catchup=args.catchup_pages)
+    else:
+        run_sites(target_sites, default_timeout=args.site_timeout,
+                  default_limit=args.limit, default_pages=args.pages, dry=(args.mode == "dry"),
+                  default_workers=args.workers, default_catchup=args.catchup_pages)
+        if args.mode == "recent":
+            conn = get_db(os.environ.get("DB_PATH", "data.db"))
+            maintenance.maybe_run(conn)
+            conn.close()
+        _write_metrics(args.metrics_json, args.metrics_prom)
+    parse_pool.shutdown()
+
+    if args.profile_startup:
+        startup_profile.report()
@@ -0,0 +1,69 @@
+"""
+Periodic DB upkeep: archive expired posts, drain every webhook that still has pending
+outbox rows, prune old outbox rows and cached items, give free pages back.
+
+Runs at most once per MAINTENANCE_EVERY seconds across every runner sharing the DB (the
+last run time lives in the meta table), from the end of a one-shot run or from the daemon.
+`main.py --mode maintain` runs it immediately.
+"""
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from discord_out import deliver_outbox
+from storage import archive_expired, claim_meta_after, incremental_vacuum, outbox_webhooks, prune_items, prune_outbox
+
+# days past its deadline a post is kept (it may still be relisted with a fixed date)
+GRACE_DAYS = int(os.getenv("RETENTION_GRACE_DAYS", "7") or 7)
+# posts without a parsed deadline are archived this long after we first saw them
+UNDATED_DAYS = int(os.getenv("RETENTION_UNDATED_DAYS", "180") or 180)
+OUTBOX_KEEP_DAYS = int(os.getenv("OUTBOX_KEEP_DAYS", "14") or 14)
+# parsed items (item_cache.py) are only reused for hash matches after their TTL anyway
+ITEM_CACHE_KEEP_DAYS = int(os.getenv("ITEM_CACHE_KEEP_DAYS", "7") or 7)
+VACUUM_PAGES = int(os.getenv("VACUUM_PAGES", "2000") or 2000)
+EVERY = int(os.getenv("MAINTENANCE_EVERY", "86400") or 86400)
+
+_KEY = "maintenance_at"
+
+def _drain_outbox(conn) -> Tuple[int, int]:
+    """
+    deliver_outbox for every webhook with pending rows, including ones no site is
+    configured with any more, so their rows are delivered or retried until parked as dead
+    instead of piling up. Returns (delivered, failed).
+    """
+    delivered = failed = 0
+    for webhook in outbox_webhooks(conn):
+        try:
+            d, f, _ = deliver_outbox(conn, webhook)
+        except Exception as e:
+            print(f"[maintenance] outbox delivery failed: {type(e).__name__}: {e}")
+            continue
+        delivered += d
+        failed += f
+    return delivered, failed
+
+def run(conn) -> Dict[str, int]:
+    started = time.monotonic()
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=GRACE_DAYS)).isoformat()
+    stats = {"archived": archive_expired(conn, cutoff, UNDATED_DAYS)}
+    stats["outbox_delivered"], stats["outbox_failed"] = _drain_outbox(conn)
+    stats.update({
+        "outbox_pruned": prune_outbox(conn, OUTBOX_KEEP_DAYS),
+        "items_pruned": prune_items(conn, ITEM_CACHE_KEEP_DAYS),
+    })
+    stats["free_pages_before"], stats["free_pages_after"] = incremental_vacuum(conn, VACUUM_PAGES)
+    print(f"[maintenance] {stats} in {time.monotonic() - started:.1f}s")
+    return stats
+
+def maybe_run(conn, every: int = EVERY) -> Optional[Dict[str, int]]:
+    """run() if nobody has in the last `every` seconds; None when it wasn't due."""
+    now = time.time()
+    try:
+        # the claim writes too, so a locked DB must not escape into the caller's loop
+        if not claim_meta_after(conn, _KEY, now - every, now):
+            return None
+        return run(conn)
+    except Exception as e:
+        print(f"[maintenance] failed: {type(e).__name__}: {e}")
+        return None
@@ -0,0 +1,156 @@
+"""
+In-process timers and counters for finding where a run's time goes.
+
+    with metrics.timer("html_parse"):
+        soup = BeautifulSoup(...)
+    metrics.incr("items", kind="new")
+
+Series are keyed by name + labels. Labels set with `tagged(site=...)` apply to everything
+recorded on that thread (the runner tags each site's thread and its detail workers), so
+shared code like sites.fetch doesn't need to know which site it's working for.
+Values are cumulative for the process; write_json()/write_prom() dump a snapshot.
+"""
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_MAX_SAMPLES = 512  # per timer series, reservoir-sampled for p50/p95
+
+class _Series:
+    __slots__ = ("count", "total", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: List[float] = []
+
+    def add(self, v: float):
+        self.count += 1
+        self.total += v
+        if v > self.max:
+            self.max = v
+        if len(self.samples) < _MAX_SAMPLES:
+            self.samples.append(v)
+        else:
+            i = random.randrange(self.count)
+            if i < _MAX_SAMPLES:
+                self.samples[i] = v
+
+_lock = threading.Lock()
+_timers: Dict[_Key, _Series] = {}
+_counters: Dict[_Key, float] = {}
+_local = threading.local()
+_STARTED = time.time()
+
+def tags() -> Dict[str, str]:
+    """Labels currently applied on this thread (hand them to worker threads via tagged(**tags()))."""
+    return dict(getattr(_local, "tags", None) or {})
+
+@contextmanager
+def tagged(**labels) -> Iterator[None]:
+    prev = getattr(_local, "tags", None)
+    _local.tags = {**(prev or {}), **{k: str(v) for k, v in labels.items()}}
+    try:
+        yield
+    finally:
+        _local.tags = prev
+
+def _key(name: str, labels: dict) -> _Key:
+    merged = {**(getattr(_local, "tags", None) or {}), **labels}
+    return name, tuple(sorted((k, str(v)) for k, v in merged.items()))
+
+def observe(name: str, seconds: float, **labels):
+    key = _key(name, labels)
+    with _lock:
+        s = _timers.get(key)
+        if s is None:
+            s = _timers[key] = _Series()
+        s.add(seconds)
+
+@contextmanager
+def timer(name: str, **labels) -> Iterator[None]:
+    """Time the block (also when it raises)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+def incr(name: str, n: float = 1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + n
+
+def _quantile(sorted_vals: List[float], q: float) -> float:
+    return sorted_vals[int(q * (len(sorted_vals) - 1))] if sorted_vals else 0.0
+
+def snapshot() -> dict:
+    with _lock:
+        timers = [(k, s.count, s.total, s.max, sorted(s.samples)) for k, s in _timers.items()]
+        counters = list(_counters.items())
+    return {
+        "started_at": _STARTED,
+        "elapsed_s": round(time.time() - _STARTED, 3),
+        "timers": [
+            {"name": name, "labels": dict(labels), "count": count, "total_s": round(total, 6),
+             "max_s": round(mx, 6), "p50_s": round(_quantile(vals, 0.5), 6), "p95_s": round(_quantile(vals, 0.95), 6)}
+            for (name, labels), count, total, mx, vals in sorted(timers, key=lambda t: (t[0][0], t[0][1]))
+        ],
+        "counters": [
+            {"name": name, "labels": dict(labels), "value": v}
+            for (name, labels), v in sorted(counters, key=lambda t: t[0])
+        ],
+    }
+
+def _atomic_write(path: str, text: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)  # textfile collectors must never see a half-written file
+
+def write_json(path: str, extra: Optional[dict] = None):
+    """Snapshot (plus extra keys) as JSON to path, or to stdout for '-'."""
+    snap = snapshot()
+    if extra:
+        snap.update(extra)
+    text = json.dumps(snap, indent=2, sort_keys=True)
+    if path == "-":
+        print(text)
+    else:
+        _atomic_write(path, text + "\n")
+
+def _prom_labels(labels: dict, **more) -> str:
+    items = {**labels, **more}
+    if not items:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in sorted(items.items())) + "}"
+
+def write_prom(path: str, prefix: str = "sweeps"):
+    """Snapshot in Prometheus text format (for node_exporter's textfile collector)."""
+    snap = snapshot()
+    out: List[str] = []
+    typed = set()
+    for t in snap["timers"]:
+        m = f"{prefix}_{t['name']}_seconds"
+        if m not in typed:
+            typed.add(m)
+            out.append(f"# TYPE {m} summary")
+        for q, key in (("0.5", "p50_s"), ("0.95", "p95_s")):
+            out.append(f"{m}{_prom_labels(t['labels'], quantile=q)} {t[key]}")
+        out.append(f"{m}_sum{_prom_labels(t['labels'])} {t['total_s']}")
+        out.append(f"{m}_count{_prom_labels(t['labels'])} {t['count']}")
+    for c in snap["counters"]:
+        m = f"{prefix}_{c['name']}_total"
+        if m not in typed:
+            typed.add(m)
+            out.append(f"# TYPE {m} counter")
+        out.append(f"{m}{_prom_labels(c['labels'])} {c['value']}")
+    _atomic_write(path, "\n".join(out) + "\n")
@@ -0,0 +1,56 @@
+"""
+Optional process pool for the CPU-bound parse stage (main.py --parse-workers N).
+
+Fetch threads hand raw HTML to submit(); a worker process runs the site module's
+parse_html and sends the item dict back. Workers are spawned and warmed up front
+(bs4, lxml, the site modules, dateparser's language data), so the first page a worker
+sees doesn't pay for imports. Metrics recorded inside workers stay there; the runner
+times each parse from its own side instead.
+"""
+import multiprocessing
+import signal
+from concurrent.futures import Future, ProcessPoolExecutor
+from importlib import import_module
+from typing import List, Optional
+
+_POOL: Optional[ProcessPoolExecutor] = None
+
+def _warm(modules: List[str]):
+    # Ctrl-C / SIGTERM go to the parent, which shuts the pool down itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import bs4  # noqa: F401
+    import lxml.etree  # noqa: F401
+    for name in modules:
+        import_module(name)
+    from sites.dates import warm
+    warm()
+
+def _ready() -> bool:
+    return True
+
+def _parse(module: str, url: str, body: str) -> dict:
+    return import_module(module).parse_html(url, body)
+
+def start(workers: int, modules: List[str]):
+    """Spawn and warm `workers` processes; a no-op for workers <= 0."""
+    global _POOL
+    if workers <= 0 or _POOL is not None:
+        return
+    # spawn, not fork: the parent already runs site/daemon threads holding locks
+    _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                initializer=_warm, initargs=(modules,))
+    for f in [_POOL.submit(_ready) for _ in range(workers)]:
+        f.result()
+
+def active() -> bool:
+    return _POOL is not None
+
+def submit(module: str, url: str, body: str) -> Future:
+    """parse_html(url, body) of the named site module, in a worker process."""
+    return _POOL.submit(_parse, module, url, body)
+
+def shutdown():
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(wait=True)
+        _POOL = None
@@ -1,6 +1,31 @@
 import os
 from importlib import import_module
 
+# Each site module provides:
+#   list_recent(n, pages, known=None, state=None) -> List[str]
+#                                        newest detail URLs, up to n over at most `pages`
+#                                        listing pages; stops paginating after a page where
+#                                        known(urls) (the URLs already in the DB) is non-empty.
+#                                        state is the site's discovery_state dict; a module
+#                                        may keep its own watermark in it (Fanatics:
+#                                        feed_newest). The runner saves it after the run.
+#   iter_recent(n, pages, known=None, state=None) -> Iterator[List[str]]
+#                                        (optional) the same URLs, one batch per listing
+#                                        page as soon as it is read, so the runner can start
+#                                        on the first posts while later pages load.
+#                                        list_recent is then just the batches joined.
+#   make_id(url) -> str                  post id (lets the runner dedup before fetching)
+#   fetch_detail(url) -> str             detail page HTML (network only)
+#   parse_html(url, body) -> dict        item dict for build_embed / storage (CPU only, no I/O)
+#   parse_detail(url) -> dict            parse_html(url, fetch_detail(url)), for one-offs
+#   feed_item(url) -> Optional[dict]     (optional) item built from the feed entry the last
+#                                        list_recent read, or None to fetch the page instead
+# The runner calls fetch_detail and parse_html itself, so it decides where each one runs.
+#
+# The modules here are declarative: a SiteSpec (sites/spec.py) compiled into a Site whose
+# bound methods are the functions above. A new site is a module with its spec, ending in
+# SITE = Site(SPEC).export(globals()), plus a REGISTRY entry.
+
 REGISTRY = {
         "freebieshark": "freebieshark",
 "fanatics": "fanatics",
@@ -21,3 +46,21 @@ def site_limit(site_key: str, default: int):
 
 def site_pages(site_key: str, default: int):
     v = os.getenv(f"{site_key.upper()}_PAGES"); return int(v) if (v and v.isdigit()) else default
+
+def site_catchup_pages(site_key: str, default: int):
+    v = os.getenv(f"{site_key.upper()}_CATCHUP_PAGES"); return int(v) if (v and v.isdigit()) else default
+
+def site_feed(site_key: str, default: bool = True):
+    v = os.getenv(f"{site_key.upper()}_FEED"); return v.strip().lower() not in ("0", "false", "no", "off") if v else default
+
+def site_workers(site_key: str, default: int):
+    v = os.getenv(f"{site_key.upper()}_WORKERS"); return int(v) if (v and v.isdigit()) else default
+
+def site_timeout(site_key: str, default: int):
+    v = os.getenv(f"{site_key.upper()}_TIMEOUT"); return int(v) if (v and v.isdigit()) else default
+
+def site_interval(site_key: str, default: int):
+    v = os.getenv(f"{site_key.upper()}_INTERVAL"); return int(v) if (v and v.isdigit()) else default
+
+def site_max_bytes(site_key: str, default: int):
+    v = os.getenv(f"{site_key.upper()}_MAX_BYTES"); return int(v) if (v and v.isdigit()) else default
@@ -0,0 +1,155 @@
+# sites/dates.py
+# Deadline/start-date parsing shared by the site parsers.
+#
+# dateparser.parse is slow (language detection on the first call, several ms per call
+# after that), while the strings we scrape are nearly always one of a few shapes:
+# "November 30, 2025", "Nov 30, 2025 11:59 PM ET", "11/30/2025". Those are parsed
+# directly here, also when more text follows the date (a details block flattened into
+# one line: "2/28/2026 Frequency: Daily ..."); anything else falls through to dateparser
+# with the same settings the sites always used. Results are memoized per (raw string,
+# PREFER_DAY_OF_MONTH).
+
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+import metrics
+
+_MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3,
+    "apr": 4, "april": 4, "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7,
+    "aug": 8, "august": 8, "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10,
+    "nov": 11, "november": 11, "dec": 12, "december": 12,
+}
+
+# Fixed offsets, matching what dateparser returns for these abbreviations
+# (it treats ET/PT as standard time; CT/MT are left to dateparser, which rejects them).
+_TZ_OFFSETS = {
+    "UTC": 0, "GMT": 0,
+    "ET": -5, "EST": -5, "EDT": -4,
+    "CST": -6, "CDT": -5,
+    "MST": -7, "MDT": -6,
+    "PT": -8, "PST": -8, "PDT": -7,
+}
+
+# US zones written out, as the standard-time abbreviation they stand for
+_TZ_WORDS = {"eastern": "EST", "central": "CST", "mountain": "MST", "pacific": "PST"}
+_TZ_WORD = re.compile(r"\s+(eastern|central|mountain|pacific)(?:\s+(?:standard\s+)?time)?\b", re.I)
+
+_TIME = r"""(?:\s+(?:at\s+)?
+    (?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?
+    \s*(?P<ampm>[ap]\.?\s?m\.?)?
+    (?:\s+(?P<tz>[a-z]{2,3}))?
+)?"""
+
+# a leading date: whatever follows has to start with whitespace
+_END = r"(?=\s|$)"
+_NAMED = re.compile(r"^(?P<month>[a-z]{3,9})\.?\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?,?\s+(?P<year>\d{4})"
+                    + _TIME + _END, re.I | re.X)
+_NUMERIC = re.compile(r"^(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4})" + _TIME + _END, re.I | re.X)
+_ISO = re.compile(r"^(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})$")
+
+_CACHE_MAX = 4096
+_cache: Dict[Tuple[str, str], Optional[datetime]] = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "fast": 0, "fallback": 0}
+
+def _fast(raw: str) -> Optional[datetime]:
+    """Parse the common shapes; None means 'not one of them' (not 'invalid date')."""
+    m = _NAMED.match(raw)
+    if m:
+        month = _MONTHS.get(m.group("month").lower())
+        if not month:
+            return None
+    else:
+        m = _NUMERIC.match(raw) or _ISO.match(raw)
+        if not m:
+            return None
+        month = int(m.group("month"))
+
+    hour = minute = second = 0
+    offset = 0
+    gd = m.groupdict()
+    if gd.get("hour"):
+        hour, minute = int(gd["hour"]), int(gd["minute"])
+        second = int(gd["second"] or 0)
+        if gd.get("ampm"):
+            if not 1 <= hour <= 12:
+                return None
+            pm = gd["ampm"].lower().startswith("p")
+            hour = (hour % 12) + (12 if pm else 0)
+        if gd.get("tz"):
+            offset = _TZ_OFFSETS.get(gd["tz"].upper())
+            if offset is None:
+                return None
+        else:
+            # a zone spelled out ("Pacific", "Eastern Time") must not read as UTC; any other
+            # word goes to dateparser ("Frequency: Daily" starts with a label, not a word)
+            zm = _TZ_WORD.match(raw, m.end())
+            if zm:
+                offset = _TZ_OFFSETS[_TZ_WORDS[zm.group(1).lower()]]
+            else:
+                nxt = raw[m.end():].split(None, 1)
+                word = nxt[0].rstrip(".,;") if nxt else ""
+                if word.isalpha() and word.upper() not in _TZ_OFFSETS:
+                    return None
+    try:
+        dt = datetime(int(m.group("year")), month, int(m.group("day")), hour, minute, second,
+                      tzinfo=timezone(timedelta(hours=offset)))
+    except ValueError:
+        return None
+    return dt.astimezone(timezone.utc)
+
+def _fallback(raw: str, prefer_day: str) -> Optional[datetime]:
+    import dateparser  # heavy; only loaded for strings the fast path can't handle
+    return dateparser.parse(raw, settings={
+        "TIMEZONE": "UTC",
+        "RETURN_AS_TIMEZONE_AWARE": True,
+        "PREFER_DAY_OF_MONTH": prefer_day,
+    })
+
+def parse_date(raw: Optional[str], prefer_day: str = "first") -> Optional[datetime]:
+    """
+    Timezone-aware datetime for a scraped date string (UTC for strings without a zone),
+    or None. prefer_day is dateparser's PREFER_DAY_OF_MONTH for strings with no day.
+    """
+    if not raw:
+        return None
+    key = (raw, prefer_day)
+    with _lock:
+        if key in _cache:
+            _stats["hits"] += 1
+            return _cache[key]
+
+    start = time.perf_counter()
+    s = raw.strip()
+    dt = _fast(s)
+    if dt is not None:
+        stat = "fast"
+    else:
+        stat = "fallback"
+        dt = _fallback(raw, prefer_day)
+    metrics.observe("date_parse", time.perf_counter() - start, path=stat)
+
+    with _lock:
+        _stats[stat] += 1
+        if len(_cache) >= _CACHE_MAX:
+            _cache.clear()
+        _cache[key] = dt
+    return dt
+
+def warm():
+    """Import dateparser and load its English data now rather than on the first odd string."""
+    _fallback("1 January 2020", "first")
+
+def clear_cache():
+    """Forget memoized results (the bench does this between rounds)."""
+    with _lock:
+        _cache.clear()
+
+def stats() -> Dict[str, int]:
+    """Counters since process start: cache hits, fast-path parses, dateparser fallbacks."""
+    with _lock:
+        return dict(_stats)
@@ -0,0 +1,276 @@
+# sites/fetch.py
+# Shared HTTP layer for the site scrapers: one pooled keep-alive requests.Session per
+# host, per-host politeness (sites.throttle), and a cached cloudscraper fallback for
+# hosts that answer 403. Clearance cookies are kept in the DB so the next run can
+# reuse them instead of solving the challenge again. Listing pages and feeds can be
+# fetched conditionally (ETag / Last-Modified validators, also kept in the DB). HTML
+# pages can be read only up to the point the parser needs (get(until=..., max_bytes=...)).
+
+import os
+import threading
+from contextlib import closing
+from typing import Callable, Dict, Iterator, Optional, Set
+from urllib.parse import urlparse
+
+import requests
+from urllib3.util.retry import Retry
+from requests.adapters import HTTPAdapter
+
+import metrics
+from sites.throttle import polite, HOST_CONCURRENCY
+
+# Keep-alive pool per host; sized so every concurrent worker gets its own connection.
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "0") or 0) or max(4, HOST_CONCURRENCY * 2)
+# How long stored clearance cookies are trusted before we go back to a plain request first.
+CF_COOKIE_TTL = int(os.getenv("CF_COOKIE_TTL", "21600") or 21600)
+# Validators older than this are ignored, forcing a full fetch now and then so a run
+# that died between the listing and the detail pages can't hide items behind 304s.
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "3600") or 3600)
+# Body read size for early-stop fetches; until() sees one chunk at a time.
+CHUNK = 16384
+# After an early stop, a rest of the body up to this size is read and thrown away so the
+# keep-alive connection goes back to the pool; a new TCP/TLS handshake costs more than
+# that. Only larger rests are cut off by closing the connection.
+DRAIN_BYTES = int(os.getenv("HTTP_DRAIN_BYTES", "131072") or 131072)
+
+_LOCK = threading.Lock()
+_SESSIONS: Dict[str, requests.Session] = {}
+_SCRAPERS: Dict[str, requests.Session] = {}
+_NEEDS_SCRAPER: Set[str] = set()
+_CHECKED: Set[str] = set()
+_SAVED_COOKIES: Dict[str, dict] = {}
+# Stand-in for the network (bench/ replays recorded pages through it); see set_fetcher().
+_FETCHER: Optional[Callable[[str, Optional[dict]], requests.Response]] = None
+
+def _host(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+def _db():
+    from storage import get_db
+    return get_db(os.environ.get("DB_PATH", "data.db"))
+
+def _new_session(backoff_factor: float) -> requests.Session:
+    s = requests.Session()
+    # 429 is not retried here and Retry-After is not slept on: a site asking us to back off
+    # is the per-site circuit breaker's call (breaker.py), not a stall inside one request
+    retries = Retry(total=3, backoff_factor=backoff_factor,
+                    status_forcelist=(500, 502, 503, 504),
+                    allowed_methods=frozenset(["GET", "HEAD"]),
+                    respect_retry_after_header=False,
+                    raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=POOL_SIZE, max_retries=retries)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+def session_for(url: str, backoff_factor: float = 0.8) -> requests.Session:
+    """The shared session for url's host (created on first use; retry policy fixed then)."""
+    host = _host(url)
+    with _LOCK:
+        s = _SESSIONS.get(host)
+        if s is None:
+            s = _SESSIONS[host] = _new_session(backoff_factor)
+        return s
+
+def _scraper_for(host: str):
+    """Cached cloudscraper for host, seeded with stored clearance cookies if we have them."""
+    with _LOCK:
+        sc = _SCRAPERS.get(host)
+        if sc is not None:
+            return sc
+        import cloudscraper
+        sc = cloudscraper.create_scraper(browser={"browser": "chrome", "platform": "linux", "mobile": False})
+        try:
+            from storage import load_cookies
+            with closing(_db()) as conn:
+                stored = load_cookies(conn, host, max_age=CF_COOKIE_TTL)
+            if stored:
+                ua, cookies = stored
+                # clearance is bound to the UA that solved it
+                sc.headers["User-Agent"] = ua
+                sc.cookies.update(cookies)
+        except Exception as e:
+            print(f"[fetch] could not restore cookies for {host}: {e}")
+        _SCRAPERS[host] = sc
+        return sc
+
+def _save_scraper_cookies(host: str, sc) -> None:
+    cookies = requests.utils.dict_from_cookiejar(sc.cookies)
+    with _LOCK:
+        if _SAVED_COOKIES.get(host) == cookies:
+            return
+        _SAVED_COOKIES[host] = cookies
+    try:
+        from storage import save_cookies
+        with closing(_db()) as conn:
+            save_cookies(conn, host, sc.headers.get("User-Agent", ""), cookies)
+    except Exception as e:
+        print(f"[fetch] could not store cookies for {host}: {e}")
+
+def _wants_scraper(host: str) -> bool:
+    """True once host has needed cloudscraper; on first sight, checks for stored clearance."""
+    with _LOCK:
+        if host in _NEEDS_SCRAPER:
+            return True
+        if host in _CHECKED:
+            return False
+        _CHECKED.add(host)
+    try:
+        from storage import load_cookies
+        with closing(_db()) as conn:
+            stored = load_cookies(conn, host, max_age=CF_COOKIE_TTL) is not None
+    except Exception:
+        stored = False
+    if stored:
+        with _LOCK:
+            _NEEDS_SCRAPER.add(host)
+    return stored
+
+def _scraper_get(url: str, headers: Optional[dict], timeout: float) -> requests.Response:
+    host = _host(url)
+    sc = _scraper_for(host)
+    # never override the scraper's UA: rotating it would invalidate the clearance cookie
+    hdrs = {k: v for k, v in (headers or {}).items() if k.lower() != "user-agent"}
+    r = sc.get(url, headers=hdrs, timeout=timeout)
+    if r.ok:
+        with _LOCK:
+            _NEEDS_SCRAPER.add(host)
+        _save_scraper_cookies(host, sc)
+    return r
+
+def _conditional_headers(url: str, headers: Optional[dict]) -> dict:
+    hdrs = dict(headers or {})
+    try:
+        from storage import load_validators
+        with closing(_db()) as conn:
+            v = load_validators(conn, url, max_age=HTTP_CACHE_MAX_AGE)
+    except Exception as e:
+        print(f"[fetch] cache lookup failed for {url}: {e}")
+        v = None
+    if v:
+        etag, last_modified = v
+        if etag:
+            hdrs["If-None-Match"] = etag
+        if last_modified:
+            hdrs["If-Modified-Since"] = last_modified
+    return hdrs
+
+def _store_validators(url: str, r: requests.Response) -> None:
+    try:
+        from storage import save_validators
+        with closing(_db()) as conn:
+            save_validators(conn, url, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+    except Exception as e:
+        print(f"[fetch] cache store failed for {url}: {e}")
+
+def set_fetcher(fn: Optional[Callable[[str, Optional[dict]], requests.Response]]):
+    """
+    Route every get() through fn(url, headers) instead of HTTP; None restores the network.
+    Politeness, cloudscraper and conditional validators are all skipped while it is set.
+    Returns the previous fetcher.
+    """
+    global _FETCHER
+    prev, _FETCHER = _FETCHER, fn
+    return prev
+
+def _read_limited(r: requests.Response, host: str, until: Optional[Callable[[bytes], bool]],
+                  max_bytes: int) -> None:
+    """
+    Read r's body chunk by chunk until until(chunk) says the caller has what it needs or
+    max_bytes are in; r.content / r.text then hold only that prefix. A short rest is
+    drained so the connection is reused (_drain); a long one is never downloaded, the
+    connection is closed instead of going back to the pool.
+    """
+    preloaded = isinstance(r._content, bytes)
+    if preloaded:
+        r._content_consumed = True  # already in memory (cloudscraper, replay): iter_content slices it
+    buf = bytearray()
+    stopped = False
+    drained = 0
+    # one iterator for reading and draining: dropping a half-read chunked stream makes
+    # urllib3 close the connection
+    chunks = r.iter_content(CHUNK)
+    try:
+        for chunk in chunks:
+            buf += chunk
+            if (max_bytes and len(buf) >= max_bytes) or (until is not None and until(chunk)):
+                stopped = True
+                break
+        if stopped and not preloaded:
+            drained = _drain(r, chunks)
+    finally:
+        r.close()
+    if max_bytes and len(buf) > max_bytes:
+        del buf[max_bytes:]
+    r._content = bytes(buf)
+    r._content_consumed = True
+    metrics.incr("http_bytes", len(buf) + max(drained, 0), host=host)
+    if stopped:
+        metrics.incr("http_early_stop", host=host, rest="drained" if drained >= 0 else "closed")
+
+def _drain(r: requests.Response, chunks: Iterator[bytes]) -> int:
+    """
+    Read and discard the rest of r's body (from chunks, the iterator it was being read with) if it is at most DRAIN_BYTES (known up front from
+    Content-Length, else found out by reading that far). Returns the bytes drained, or -1
+    if the rest is longer and the connection has to be closed.
+    """
+    length = r.headers.get("Content-Length", "")
+    tell = getattr(r.raw, "tell", None)
+    if length.isdigit() and tell is not None and int(length) - tell() > DRAIN_BYTES:
+        return -1  # Content-Length counts wire (possibly compressed) bytes, like tell()
+    drained = 0
+    for chunk in chunks:
+        drained += len(chunk)
+        if drained > DRAIN_BYTES:
+            return -1
+    return drained
+
+def get(url: str, headers: Optional[dict] = None, timeout: float = 25,
+        backoff_factor: float = 0.8, min_interval: float = 0.35, jitter: float = 0.65,
+        conditional: bool = False, until: Optional[Callable[[bytes], bool]] = None,
+        max_bytes: int = 0) -> requests.Response:
+    """
+    GET url politely through the host's pooled session. Hosts that have needed cloudscraper
+    (this process, or with fresh stored cookies) go straight to the cached scraper.
+    With conditional=True, stored validators are sent and the caller must handle a 304
+    (r.status_code == 304, empty body). Raises for other non-2xx like the old _get_soup did.
+    until (called with each body chunk, e.g. sites.regions.EndOf) and max_bytes stop reading
+    the body early; the response then carries only what was read.
+    """
+    host = _host(url)
+    stream = until is not None or max_bytes > 0
+    if _FETCHER is not None:
+        with metrics.timer("http_request", host=host):
+            r = _FETCHER(url, headers)
+        metrics.incr("http_responses", host=host, status=r.status_code)
+        r.raise_for_status()
+        if stream:
+            _read_limited(r, host, until, max_bytes)
+        return r
+    if conditional:
+        headers = _conditional_headers(url, headers)
+    with polite(url, min_interval=min_interval, jitter=jitter), metrics.timer("http_request", host=host):
+        r = None
+        if _wants_scraper(host):
+            try:
+                r = _scraper_get(url, headers, timeout)
+            except Exception as e:
+                print(f"[fetch] cloudscraper failed for {host}: {e}")
+        if r is None:
+            r = session_for(url, backoff_factor).get(url, headers=headers, timeout=timeout, stream=stream)
+            if r.status_code == 403:
+                r.close()
+                try:
+                    r = _scraper_get(url, headers, timeout)
+                except Exception:
+                    pass
+        if stream:
+            if r.ok:
+                _read_limited(r, host, until, max_bytes)  # the body is part of the request's time
+            else:
+                r.close()  # error bodies aren't read; raise_for_status below
+    metrics.incr("http_responses", host=host, status=r.status_code)
+    r.raise_for_status()
+    if conditional and r.status_code == 200:
+        _store_validators(url, r)
+    return r
@@ -0,0 +1,123 @@
+# sites/labels.py
+# Single-pass "Label: value" extraction shared by the site parsers.
+#
+# The old per-site scanners called el.get_text(" ") on every p/li/div/span/strong/b,
+# re-flattening the same nested text once per ancestor (and once per label on
+# FreeBieShark). LabelIndex walks the tree once, builds every tag's normalized text
+# bottom-up from its children, and keeps the block-level lines that contain a colon.
+
+import re
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple, Union
+
+import metrics
+
+BLOCK_TAGS = ("p", "li", "div", "span", "strong", "b")
+
+_WS = re.compile(r"\s+")
+
+def _norm(s: str) -> str:
+    return _WS.sub(" ", s.strip())
+
+class Labels:
+    """
+    key -> pattern (strings are compiled with `flags`), plus one alternation of all of
+    them: a line no pattern matches is skipped after a single search instead of one per key.
+    """
+
+    def __init__(self, patterns: Dict[str, Union[str, Pattern]], flags: int = re.I):
+        self.patterns = {k: p if isinstance(p, re.Pattern) else re.compile(p, flags) for k, p in patterns.items()}
+        same = len({p.flags for p in self.patterns.values()}) <= 1
+        self.any = re.compile("|".join(f"(?:{p.pattern})" for p in self.patterns.values()),
+                              next(iter(self.patterns.values())).flags) if self.patterns and same else None
+
+    def items(self):
+        return self.patterns.items()
+
+def _labels(patterns) -> Labels:
+    return patterns if isinstance(patterns, Labels) else Labels(patterns)
+
+class LabelIndex:
+    """
+    One walk over scope. text(tag) returns _text(tag.get_text(" ")) for any tag under scope;
+    lines holds (text, label, value) for each block tag whose text contains ':', in the
+    same document order find_all(BLOCK_TAGS) would visit them.
+    """
+
+    def __init__(self, scope, tags: Sequence[str] = BLOCK_TAGS):
+        with metrics.timer("label_index"):
+            self._build(scope, tags)
+
+    def _build(self, scope, tags: Sequence[str]):
+        from bs4 import CData, NavigableString, Tag
+        # Same strings Tag.get_text() picks up by default (no comments, scripts, styles, templates).
+        text_types = (NavigableString, CData)
+        self._texts: Dict[int, str] = {}
+        self.lines: List[Tuple[str, str, str]] = []
+        wanted = set(tags)
+        blocks: List[Tag] = []
+
+        stack: List[Tuple[Tag, bool]] = [(scope, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                parts = []
+                for c in node.contents:
+                    if isinstance(c, Tag):
+                        parts.append(self._texts[id(c)])
+                    elif type(c) in text_types:
+                        parts.append(c)
+                self._texts[id(node)] = _norm(" ".join(parts))
+                continue
+            if node is not scope and node.name in wanted:
+                blocks.append(node)
+            stack.append((node, True))
+            for c in reversed(node.contents):
+                if isinstance(c, Tag):
+                    stack.append((c, False))
+
+        for el in blocks:
+            t = self._texts[id(el)]
+            if ":" in t:
+                label, val = t.split(":", 1)
+                self.lines.append((t, label, val.strip()))
+
+    def text(self, tag) -> str:
+        # script/style tags themselves differ from get_text(); nothing here asks for them
+        t = self._texts.get(id(tag))
+        return t if t is not None else _norm(tag.get_text(" "))
+
+    def first(self, patterns: Union[Labels, Dict[str, Pattern]]) -> Dict[str, Optional[str]]:
+        """
+        For each key, the value of the first line whose label (text before the first ':')
+        matches its pattern and whose value is non-empty. All keys in one pass over lines.
+        """
+        labels = _labels(patterns)
+        result: Dict[str, Optional[str]] = {k: None for k, _ in labels.items()}
+        pending = dict(labels.items())
+        for _, label, val in self.lines:
+            if not val or (labels.any is not None and not labels.any.search(label)):
+                continue
+            for key, pat in list(pending.items()):
+                if pat.search(label):
+                    result[key] = val
+                    del pending[key]
+            if not pending:
+                break
+        return result
+
+    def last(self, patterns: Union[Labels, Dict[str, Pattern]]) -> Dict[str, Optional[str]]:
+        """
+        Pattern searched over the whole line; the first matching key claims the line and
+        later lines overwrite earlier ones (so the innermost block wins).
+        """
+        labels = _labels(patterns)
+        result: Dict[str, Optional[str]] = {k: None for k, _ in labels.items()}
+        for text, _, val in self.lines:
+            if labels.any is not None and not labels.any.search(text):
+                continue
+            for key, pat in labels.items():
+                if pat.search(text):
+                    if val:
+                        result[key] = val
+                    break
+        return result
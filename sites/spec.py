@@ -0,0 +1,443 @@
+# sites/spec.py
+# Declarative site definitions and the one engine that runs them.
+#
+# Every scraper does the same things: fetch politely, walk a listing (or a WordPress feed)
+# for detail links, then pull title, prize, labeled fields, dates, entry/rules links and
+# image out of each detail page. A site module only describes where those live
+# (SiteSpec); Site compiles the description once (soupsieve selectors, label regexes,
+# detail regions) and provides the module contract from sites/__init__.py, so a new site
+# is a spec and every site gets the shared fast paths.
+
+from __future__ import annotations  # bs4/soupsieve are imported lazily; hints stay strings
+
+import hashlib
+import random
+import re
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+import metrics
+from sites import feeds, fetch, site_feed, site_max_bytes
+from sites.dates import parse_date
+from sites.labels import LabelIndex, Labels
+from sites.regions import EndOf, Regions
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+UA_POOL = [
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
+]
+
+def browser_headers() -> dict:
+    return {
+        "User-Agent": random.choice(UA_POOL),
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Cache-Control": "no-cache",
+        "Pragma": "no-cache",
+        "Connection": "keep-alive",
+        "Upgrade-Insecure-Requests": "1",
+    }
+
+# fetch.get politeness/retry settings; a spec overrides single keys
+FETCH_DEFAULTS = {"timeout": 25, "backoff_factor": 0.8, "min_interval": 0.35, "jitter": 0.65}
+# Most an HTML page read is allowed to download (per site: <SITE>_MAX_BYTES, 0 = no cap).
+MAX_BYTES = 1 << 20
+
+# "first paragraph that reads like a prize"
+PRIZE_WORDS = re.compile(r"\b(\$[0-9]|winners?|prize|cash|gift|card)\b", re.I)
+
+_WS = re.compile(r"\s+")
+
+def _text(s: Optional[str]) -> str:
+    return _WS.sub(" ", (s or "").strip())
+
+TitleStep = Union[str, Tuple[str, str]]
+
+class SiteSpec:
+    """
+    Where a site keeps things. Selectors are CSS (soupsieve), patterns regex strings
+    (case-insensitive). Site compiles it.
+
+    key               site key (REGISTRY, <SITE>_FEED, log lines)
+    base              site root; relative links resolve against it
+    detail_regions    the detail page parts parse_html reads (sites.regions)
+
+    Discovery (feed, listing or both):
+    feed              WordPress feed URL: URLs and post bodies come from it (<SITE>_FEED=0
+                      turns the bodies off, or switches to the listing if there is one)
+    feed_required     fields a feed entry must yield, else its detail page is fetched;
+                      image_url only counts when the entry carries its own image (media:*,
+                      enclosure), since the body's inline images aren't the featured one
+    listing           first listing page; listing_paged formats page N >= 2 ({page})
+    link_selector     detail links on a listing page; link_exclude drops hrefs containing
+                      any of these substrings
+    listing_regions   the listing parts link_selector reads
+    trim_at_known     cut the list at the first known URL (else keep the page, stop paging)
+
+    Detail page:
+    title             tried in order: "og:<prop>" meta, or a CSS selector's text; a
+                      (step, regex) pair strips the regex from that step's text
+    content           CSS selectors for the post body, first match wins (else the page);
+                      labels, prize paragraphs, entry links and the image fallback look there
+    labels            output field -> regex for "Label: value" lines; matched against the
+                      label (first line wins) or, with label_lines, the whole line (last
+                      wins); label_dl also reads <dt>/<dd> pairs
+    prize_heading     a heading (h3/h4) whose next block is the prize summary
+    prize_words       else the first paragraph matching PRIZE_WORDS
+    prize_chars       else the first prize_chars characters of the body
+    prefer_day        dates without a day: "first" or "last" of the month
+    own_host          links to hosts containing this aren't entry links
+    entry_text        text near the entry link ("Enter Here"); entry_scores (regex, points)
+                      rank the off-site links by their text, else the first one wins
+    rules_text        text near the rules link; rules_selector otherwise
+    image_selector    <img> to use when there is no og:image (in the post body, when the
+                      spec has content selectors and one matched)
+
+    Fetching:
+    end_at            listing and detail pages are read only up to the end of the first
+                      element matching this ("main"); the regions must all come before it
+    max_bytes         byte budget per listing/detail page (<SITE>_MAX_BYTES overrides)
+    fetch             sites.fetch.get keyword overrides (FETCH_DEFAULTS)
+    """
+
+    def __init__(self, key: str, base: str, detail_regions: Regions, *,
+                 feed: Optional[str] = None, listing: Optional[str] = None, listing_paged: Optional[str] = None,
+                 link_selector: Optional[str] = None, link_exclude: Sequence[str] = (),
+                 listing_regions: Optional[Regions] = None, trim_at_known: bool = False,
+                 feed_required: Sequence[str] = ("title", "end_date", "entry_link", "image_url"),
+                 title: Sequence[TitleStep] = ("og:title", "h1", "title"), title_default: str = "Sweepstakes",
+                 content: Sequence[str] = (), labels: Optional[Dict[str, str]] = None,
+                 label_lines: bool = False, label_dl: bool = False,
+                 prize_heading: Optional[str] = None, prize_words: bool = False, prize_chars: Optional[int] = None,
+                 prefer_day: str = "first", own_host: Optional[str] = None,
+                 entry_text: Optional[str] = None, entry_scores: Sequence[Tuple[str, int]] = (),
+                 rules_text: Optional[str] = None, rules_selector: Optional[str] = None,
+                 image_selector: Optional[str] = None, end_at: Optional[str] = None,
+                 max_bytes: int = MAX_BYTES, fetch: Optional[dict] = None):
+        self.key = key
+        self.base = base
+        self.detail_regions = detail_regions
+        self.feed = feed
+        self.listing = listing
+        self.listing_paged = listing_paged
+        self.link_selector = link_selector
+        self.link_exclude = tuple(link_exclude)
+        self.listing_regions = listing_regions
+        self.trim_at_known = trim_at_known
+        self.feed_required = tuple(feed_required)
+        self.title = tuple(title)
+        self.title_default = title_default
+        self.content = tuple(content)
+        self.labels = dict(labels or {})
+        self.label_lines = label_lines
+        self.label_dl = label_dl
+        self.prize_heading = prize_heading
+        self.prize_words = prize_words
+        self.prize_chars = prize_chars
+        self.prefer_day = prefer_day
+        self.own_host = own_host or (urlparse(base).hostname or "").lower().replace("www.", "", 1)
+        self.entry_text = entry_text
+        self.entry_scores = tuple(entry_scores)
+        self.rules_text = rules_text
+        self.rules_selector = rules_selector
+        self.image_selector = image_selector
+        self.end_at = EndOf(end_at) if end_at else None
+        self.max_bytes = site_max_bytes(key, max_bytes)
+        self.fetch = {**FETCH_DEFAULTS, **(fetch or {})}
+
+class Site:
+    """
+    A compiled SiteSpec. Its bound methods are the site module's contract (make_id,
+    fetch_detail, parse_html, parse_detail, iter_recent, list_recent, feed_item).
+    Regexes compile here; CSS selectors on the first parse, so runs that never parse
+    (304 listings) never import bs4/soupsieve.
+    """
+
+    CONTRACT = ("make_id", "fetch_detail", "parse_html", "parse_detail", "iter_recent", "list_recent")
+
+    def export(self, namespace: dict) -> "Site":
+        """
+        Bind the contract into a site module's globals (feed_item only for feed sites), so
+        the module is just its spec: SITE = Site(SPEC).export(globals()).
+        """
+        names = self.CONTRACT + (("feed_item",) if self.spec.feed else ())
+        namespace.update((name, getattr(self, name)) for name in names)
+        return self
+
+    def __init__(self, spec: SiteSpec):
+        self.spec = spec
+        self.labels = Labels(spec.labels)
+        self.title_strip = {i: re.compile(step[1], re.I) for i, step in enumerate(spec.title) if isinstance(step, tuple)}
+        self.entry_text = re.compile(spec.entry_text, re.I) if spec.entry_text else None
+        self.entry_scores = [(re.compile(p, re.I), pts) for p, pts in spec.entry_scores]
+        self.rules_text = re.compile(spec.rules_text, re.I) if spec.rules_text else None
+        self.prize_heading = re.compile(spec.prize_heading, re.I) if spec.prize_heading else None
+        self.feed_pages = feeds.FeedPages(required=spec.feed_required)
+        self._css: Optional[Dict[str, object]] = None
+
+    # -- compiled selectors -------------------------------------------------------------
+
+    def _compiled(self) -> Dict[str, object]:
+        if self._css is None:
+            import soupsieve
+            s = self.spec
+            sels = {"a[href]", "img[src]", "h3, h4"}
+            sels.update(f'meta[property="{step}"][content]' for step in self._title_steps() if step.startswith("og:"))
+            sels.update(step for step in self._title_steps() if not step.startswith("og:"))
+            sels.update(s.content)
+            sels.update(x for x in (s.link_selector, s.rules_selector, s.image_selector) if x)
+            sels.update(('meta[property="og:image"][content]',))
+            self._css = {sel: soupsieve.compile(sel) for sel in sels}
+        return self._css
+
+    def _title_steps(self) -> List[str]:
+        return [step[0] if isinstance(step, tuple) else step for step in self.spec.title]
+
+    def _one(self, sel: str, scope):
+        css = self._compiled().get(sel)
+        return css.select_one(scope) if css is not None else scope.select_one(sel)
+
+    def _all(self, sel: str, scope):
+        css = self._compiled().get(sel)
+        return css.select(scope) if css is not None else scope.select(sel)
+
+    # -- fetching -----------------------------------------------------------------------
+
+    def _fetch(self, url: str, conditional: bool = False) -> Optional[str]:
+        # pooled per-host session + politeness + cloudscraper fallback (sites.fetch);
+        # conditional=True returns None when the page is unchanged (304); the body is read
+        # only up to spec.end_at / spec.max_bytes
+        s = self.spec
+        r = fetch.get(url, headers=browser_headers(), conditional=conditional,
+                      until=s.end_at.until() if s.end_at else None, max_bytes=s.max_bytes, **s.fetch)
+        if r.status_code == 304:
+            return None
+        return r.text
+
+    def _soup(self, body: str, regions: Optional[Regions] = None) -> BeautifulSoup:
+        from bs4 import BeautifulSoup  # deferred: a 304 listing never needs a parser
+        with metrics.timer("html_parse"):
+            return regions.soup(body) if regions else BeautifulSoup(body, "lxml")
+
+    def make_id(self, url: str) -> str:
+        """Post id is the sha1 of the detail URL (lets the runner dedup before fetching)."""
+        return hashlib.sha1(url.encode()).hexdigest()
+
+    def fetch_detail(self, url: str) -> str:
+        """Detail page HTML (the network half of parse_detail)."""
+        return self._fetch(url)
+
+    def parse_detail(self, url: str) -> dict:
+        return self.parse_html(url, self.fetch_detail(url))
+
+    # -- discovery ----------------------------------------------------------------------
+
+    def list_recent(self, n: int = 40, pages: int = 1, known=None, state=None) -> List[str]:
+        return [u for batch in self.iter_recent(n=n, pages=pages, known=known, state=state) for u in batch]
+
+    def iter_recent(self, n: int = 40, pages: int = 1, known=None, state=None) -> Iterator[List[str]]:
+        """
+        Newest detail URLs, one batch per page read: from the feed (post bodies kept for
+        feed_item) or the listing pages. With the feed off (<SITE>_FEED=0), a site with a
+        listing reads that instead; a feed-only site still discovers through the feed.
+        A feed whose first page fails falls back to the listing; later failures raise.
+        """
+        s = self.spec
+        self.feed_pages.load([])
+        bodies = bool(s.feed) and site_feed(s.key)
+        if s.feed and (bodies or not s.listing):
+            started = False
+            try:
+                for entries in feeds.iter_pages(s.feed, n, pages, known=known, state=state,
+                                                headers=browser_headers(), **s.fetch):
+                    started = True
+                    if bodies:
+                        self.feed_pages.add(entries)
+                    yield [link for link, _ in entries]
+                return
+            except requests.RequestException as e:
+                if started or not s.listing:
+                    raise
+                print(f"[{s.key}] feed failed ({type(e).__name__}: {e}); reading the listing pages")
+        if s.listing:
+            yield from self._iter_listing(n, pages, known)
+
+    def _iter_listing(self, n: int, pages: int, known=None) -> Iterator[List[str]]:
+        """
+        Detail URLs from the listing pages, newest first, one batch per page. With known=,
+        stop at the first page holding a post we already have (trim_at_known: cut it there).
+        """
+        s = self.spec
+        out: List[str] = []
+        seen = set()
+        last = max(1, pages) if s.listing_paged else 1
+        for page in range(1, last + 1):
+            url = s.listing if page == 1 else s.listing_paged.format(page=page)
+            try:
+                body = self._fetch(url, conditional=(page == 1))
+            except requests.HTTPError as e:
+                if page > 1 and e.response is not None and e.response.status_code == 404:
+                    break  # walked past the last listing page
+                raise
+            if body is None:
+                return  # first page unchanged -> nothing new deeper either
+            soup = self._soup(body, s.listing_regions)
+            page_urls: List[str] = []
+            for a in self._all(s.link_selector, soup):
+                href = a.get("href")
+                if not href:
+                    continue
+                abs_url = urljoin(s.base, href)
+                if any(x in abs_url for x in s.link_exclude) or abs_url in seen:
+                    continue
+                seen.add(abs_url)
+                out.append(abs_url)
+                page_urls.append(abs_url)
+                if len(out) >= n:
+                    break
+            hit = known(page_urls) if known is not None and page_urls else ()
+            if hit and s.trim_at_known:
+                page_urls = page_urls[:next(i for i, u in enumerate(page_urls) if u in hit)]
+            if page_urls:
+                yield page_urls
+            if len(out) >= n or not page_urls or hit:
+                break  # reached posts from earlier runs; deeper pages are older still
+
+    def feed_item(self, url: str) -> Optional[dict]:
+        """parse_html over the feed entry for url (no request), or None to fetch the page."""
+        return self.feed_pages.item(url, self.parse_html)
+
+    # -- detail page --------------------------------------------------------------------
+
+    def _meta(self, soup, prop: str) -> Optional[str]:
+        m = self._one(f'meta[property="{prop}"][content]', soup)
+        return m["content"] if m and m.get("content") else None
+
+    def _title(self, soup) -> str:
+        for i, step in enumerate(self._title_steps()):
+            if step.startswith("og:"):
+                t = _text(self._meta(soup, step))
+            else:
+                el = self._one(step, soup)
+                t = _text(el.get_text(" ")) if el else ""
+            if t and i in self.title_strip:
+                t = self.title_strip[i].sub("", t)
+            if t:
+                return t
+        return self.spec.title_default
+
+    def _labeled(self, content, index: LabelIndex) -> Dict[str, Optional[str]]:
+        if not self.spec.label_lines:
+            return index.first(self.labels)
+        result = index.last(self.labels)
+        if self.spec.label_dl and any(v is None for v in result.values()):
+            for dt in content.find_all("dt"):
+                label = index.text(dt)
+                dd = dt.find_next_sibling("dd")
+                val = index.text(dd) if dd else None
+                line = f"{label}: {val}" if val else label
+                for key, pat in self.labels.items():
+                    if pat.search(line):
+                        result[key] = val
+        return result
+
+    def _prize(self, content, index: LabelIndex) -> Optional[str]:
+        if self.prize_heading is not None:
+            for hdr in self._all("h3, h4", content):
+                if self.prize_heading.search(index.text(hdr)):
+                    b = hdr.find_next(["p", "div", "li"])
+                    if b:
+                        return index.text(b)
+        if self.spec.prize_words:
+            for p in content.find_all("p"):
+                t = index.text(p)
+                if PRIZE_WORDS.search(t):
+                    return t
+        if self.spec.prize_chars:
+            return index.text(content)[:self.spec.prize_chars]
+        return None
+
+    def _near(self, soup, pat) -> Optional[str]:
+        # a link inside the element holding the text ("Enter Here", "Rules Page")
+        for tag in soup.find_all(string=pat):
+            parent = tag.parent
+            if parent:
+                a = parent.find("a", href=True)
+                if a:
+                    return urljoin(self.spec.base, a["href"])
+        return None
+
+    def _entry_link(self, content) -> Optional[str]:
+        if self.entry_text is not None:
+            link = self._near(content, self.entry_text)
+            if link:
+                return link
+        best, best_score = None, None
+        for a in self._all("a[href]", content):
+            href = a.get("href", "").strip()
+            if not href:
+                continue
+            abs_url = urljoin(self.spec.base, href)
+            if self.spec.own_host in (urlparse(abs_url).hostname or ""):
+                continue
+            if not self.entry_scores:
+                return abs_url  # no ranking: the first off-site link
+            text = _text(a.get_text(" "))
+            score = sum(pts for pat, pts in self.entry_scores if pat.search(text))
+            if best_score is None or score > best_score:
+                best, best_score = abs_url, score
+        return best
+
+    def _rules_link(self, soup) -> Optional[str]:
+        if self.rules_text is not None:
+            link = self._near(soup, self.rules_text)
+            if link:
+                return link
+        if self.spec.rules_selector:
+            for a in self._all(self.spec.rules_selector, soup):
+                href = a.get("href")
+                if href:
+                    return urljoin(self.spec.base, href)
+        return None
+
+    def _image(self, soup, content) -> Optional[str]:
+        m = self._one('meta[property="og:image"][content]', soup)
+        if m and m.get("content"):
+            return m["content"].strip()
+        if self.spec.image_selector and content is not None:
+            im = self._one(self.spec.image_selector, content)
+            if im and im.get("src"):
+                return urljoin(self.spec.base, im["src"])
+        return None
+
+    def parse_html(self, url: str, body: str) -> dict:
+        s = self.spec
+        soup = self._soup(body, s.detail_regions)
+        title = self._title(soup)
+        post = next((c for c in (self._one(sel, soup) for sel in s.content) if c is not None), None)
+        content = soup if post is None else post
+
+        # one walk over the content; paragraph text and labels both come from it
+        index = LabelIndex(content)
+        labeled = self._labeled(content, index)
+        prize_summary = labeled.get("prize_summary") or self._prize(content, index)
+
+        return {
+            "id": self.make_id(url),
+            "source": url,
+            "title": title,
+            "prize_summary": prize_summary,
+            "entry_frequency": labeled.get("entry_frequency"),
+            "eligibility": labeled.get("eligibility"),
+            "start_date": parse_date(labeled.get("start_date"), prefer_day=s.prefer_day),
+            "end_date": parse_date(labeled.get("end_date"), prefer_day=s.prefer_day),
+            "entry_link": self._entry_link(content),
+            "rules_link": self._rules_link(soup),
+            "image_url": self._image(soup, content if post is not None or not s.content else None),
+        }
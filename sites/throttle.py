@@ -0,0 +1,60 @@
+# sites/throttle.py
+# Per-host politeness shared by all site scrapers: a one-token bucket that spaces
+# request starts by a jittered minimum interval, plus a cap on in-flight requests.
+
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+from urllib.parse import urlparse
+
+import metrics
+
+HOST_CONCURRENCY = int(os.getenv("HOST_CONCURRENCY", "2") or 2)
+
+class HostBucket:
+    def __init__(self, concurrency: int, host: str = ""):
+        self.host = host
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+        self._slots = threading.BoundedSemaphore(max(1, concurrency))
+
+    def _reserve(self, min_interval: float, jitter: float) -> float:
+        """Claim the next start time for this host; returns how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at)
+            self._next_at = start + min_interval + random.uniform(0, jitter)
+            return start - now
+
+    @contextmanager
+    def slot(self, min_interval: float, jitter: float):
+        waited = time.perf_counter()
+        with self._slots:
+            delay = self._reserve(min_interval, jitter)
+            if delay > 0:
+                time.sleep(delay)
+            # time queued for a slot plus the spacing sleep, i.e. politeness cost
+            metrics.observe("throttle_wait", time.perf_counter() - waited, host=self.host)
+            yield
+
+_BUCKETS: Dict[str, HostBucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+
+def bucket(url: str) -> HostBucket:
+    host = (urlparse(url).hostname or "").lower()
+    with _BUCKETS_LOCK:
+        b = _BUCKETS.get(host)
+        if b is None:
+            b = _BUCKETS[host] = HostBucket(HOST_CONCURRENCY, host)
+        return b
+
+def polite(url: str, min_interval: float = 0.35, jitter: float = 0.65):
+    """
+    Context manager wrapping one request to url's host:
+        with polite(url):
+            r = sess.get(url, ...)
+    """
+    return bucket(url).slot(min_interval, jitter)
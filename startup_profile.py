@@ -0,0 +1,67 @@
+"""
+Import timing for `main.py --profile-startup`.
+
+install() wraps builtins.__import__ so every module imported for the first time is timed
+(inclusive and self time, plus when it happened relative to process start). report()
+prints the heaviest imports and whether each heavy dependency was loaded at all, which
+is how we check that a no-new-items run never pays for bs4/lxml/dateparser.
+"""
+import builtins
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+HEAVY = ("requests", "urllib3", "bs4", "lxml", "dateparser", "feedparser", "cloudscraper")
+
+_t0 = time.perf_counter()
+_orig_import = builtins.__import__
+_records: Dict[str, dict] = {}
+_local = threading.local()  # per-thread stack: site threads import lazily in parallel
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _orig_import(name, globals, locals, fromlist, level)
+    stack: List[list] = getattr(_local, "stack", None) or []
+    _local.stack = stack
+    frame = [name, 0.0]  # name, time spent in nested first-time imports
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        return _orig_import(name, globals, locals, fromlist, level)
+    finally:
+        took = time.perf_counter() - start
+        stack.pop()
+        if stack:
+            stack[-1][1] += took
+        if name not in _records:
+            _records[name] = {
+                "total": took,
+                "self": took - frame[1],
+                "at": start - _t0,
+                "top": not stack,
+            }
+
+def install(t0: Optional[float] = None):
+    """Start timing imports; t0 is the process-start reference (defaults to now)."""
+    global _t0
+    if t0 is not None:
+        _t0 = t0
+    builtins.__import__ = _timed_import
+
+def report(top: int = 15):
+    builtins.__import__ = _orig_import
+    total = time.perf_counter() - _t0
+    print(f"\n[startup] {len(_records)} first-time imports, process time so far {total*1000:.0f}ms")
+    rows = sorted(_records.items(), key=lambda kv: -kv[1]["total"])
+    print(f"[startup] {'module':<32} {'incl ms':>8} {'self ms':>8} {'at ms':>8}")
+    for name, r in [kv for kv in rows if kv[1]["top"]][:top]:
+        print(f"[startup] {name:<32} {r['total']*1000:8.1f} {r['self']*1000:8.1f} {r['at']*1000:8.1f}")
+    for dep in HEAVY:
+        r = _records.get(dep)
+        if r:
+            print(f"[startup] heavy {dep:<16} loaded at +{r['at']*1000:.0f}ms ({r['total']*1000:.1f}ms)")
+        elif dep in sys.modules:
+            print(f"[startup] heavy {dep:<16} loaded before profiling started")
+        else:
+            print(f"[startup] heavy {dep:<16} not loaded")
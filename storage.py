@@ -1,22 +1,155 @@
+import os
+import json
+import hashlib
+import time
 import sqlite3
-from typing import Optional
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Iterable, List, Set, Tuple
 from contextlib import closing
 
-def get_db(path="data.db"):
-    conn = sqlite3.connect(path)
-    conn.execute("""CREATE TABLE IF NOT EXISTS posts (
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS posts (
       id TEXT PRIMARY KEY,
       url TEXT,
       title TEXT,
       deadline_utc TEXT,
       created_at_utc TEXT DEFAULT CURRENT_TIMESTAMP
-    )""")
+    )""",
+    """CREATE TABLE IF NOT EXISTS http_cookies (
+      host TEXT PRIMARY KEY,
+      user_agent TEXT,
+      cookies_json TEXT,
+      updated_at_utc TEXT DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS http_cache (
+      url TEXT PRIMARY KEY,
+      etag TEXT,
+      last_modified TEXT,
+      stored_at_utc TEXT DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS outbox (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      webhook TEXT NOT NULL,
+      site TEXT,
+      post_id TEXT,
+      embed_json TEXT NOT NULL,
+      status TEXT NOT NULL DEFAULT 'pending',
+      attempts INTEGER NOT NULL DEFAULT 0,
+      next_attempt_at REAL NOT NULL DEFAULT 0,
+      last_error TEXT,
+      created_at_utc TEXT DEFAULT CURRENT_TIMESTAMP,
+      delivered_at_utc TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (webhook, next_attempt_at) WHERE status='pending'",
+    # LSH bands of post title signatures (see dedup.py)
+    """CREATE TABLE IF NOT EXISTS post_bands (
+      band INTEGER NOT NULL,
+      post_id TEXT NOT NULL,
+      PRIMARY KEY (band, post_id)
+    ) WITHOUT ROWID""",
+    # ids of archived (expired) posts, as 64-bit hashes: ~8 bytes a row instead of a full posts row
+    "CREATE TABLE IF NOT EXISTS seen_archive (h INTEGER PRIMARY KEY)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    # per-site listing watermarks (see main.run_for_site); retry_json holds {url: attempts}
+    """CREATE TABLE IF NOT EXISTS discovery_state (
+      site TEXT PRIMARY KEY,
+      last_url TEXT,
+      feed_newest TEXT,
+      retry_json TEXT,
+      updated_at_utc TEXT DEFAULT CURRENT_TIMESTAMP
+    )""",
+    # per-site circuit breaker (see breaker.py)
+    """CREATE TABLE IF NOT EXISTS site_breaker (
+      site TEXT PRIMARY KEY,
+      state TEXT NOT NULL DEFAULT 'closed',
+      failures INTEGER NOT NULL DEFAULT 0,
+      trips INTEGER NOT NULL DEFAULT 0,
+      open_until REAL NOT NULL DEFAULT 0,
+      last_status INTEGER,
+      updated_at_utc TEXT DEFAULT CURRENT_TIMESTAMP
+    )""",
+    # parsed detail items by canonical URL, with the hash of the body they came from (see item_cache.py)
+    """CREATE TABLE IF NOT EXISTS item_cache (
+      url TEXT PRIMARY KEY,
+      body_hash TEXT NOT NULL,
+      item_json TEXT NOT NULL,
+      cached_at REAL NOT NULL
+    )""",
+]
+
+# Columns added after a table first shipped: (table, column, declaration). Older DB files
+# get them via ALTER TABLE; the index DDL that depends on them runs afterwards.
+COLUMNS = [
+    ("posts", "entry_key", "TEXT"),
+    ("posts", "minhash", "BLOB"),
+    ("posts", "dup_of", "TEXT"),
+]
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS posts_entry_key ON posts (entry_key) WHERE entry_key IS NOT NULL",
+    "CREATE INDEX IF NOT EXISTS posts_deadline ON posts (deadline_utc)",
+    "CREATE INDEX IF NOT EXISTS posts_created ON posts (created_at_utc)",
+]
+
+# Paths whose schema has been created by this process; CREATE TABLE runs once per path.
+_READY: Set[str] = set()
+_READY_LOCK = threading.Lock()
+
+def _init_schema(conn, path: str):
+    key = os.path.abspath(path) if path != ":memory:" else None
+    if key and key in _READY:
+        return
+    with _READY_LOCK:
+        if key and key in _READY:
+            return
+        # only takes effect on a new file; older files are converted by incremental_vacuum()
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        # WAL is persistent in the file: readers (other site runners) no longer block on a writer
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            for ddl in SCHEMA:
+                conn.execute(ddl)
+            for table, col, decl in COLUMNS:
+                have = {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+                if col not in have:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {decl}")
+            for ddl in INDEXES:
+                conn.execute(ddl)
+        if key:
+            _READY.add(key)
+
+def get_db(path="data.db"):
+    conn = sqlite3.connect(path, timeout=30)
+    # NORMAL is durable across app crashes in WAL mode and skips the per-commit fsync
+    conn.execute("PRAGMA synchronous=NORMAL")
+    _init_schema(conn, path)
     return conn
 
+def _archive_key(pid: str) -> int:
+    return int.from_bytes(hashlib.blake2b(pid.encode(), digest_size=8).digest(), "big", signed=True)
+
 def seen(conn, pid: str) -> bool:
+    return bool(seen_many(conn, [pid]))
+
+def seen_many(conn, pids: Iterable[str]) -> Set[str]:
+    """
+    Return the subset of pids already in posts or archived (chunked to stay under SQLite's
+    variable limit), so a URL that reappears after its post was archived is still seen.
+    """
+    pids = list(dict.fromkeys(pids))
+    found: Set[str] = set()
     with closing(conn.cursor()) as cur:
-        cur.execute("SELECT 1 FROM posts WHERE id=?", (pid,))
-        return cur.fetchone() is not None
+        for i in range(0, len(pids), 500):
+            chunk = pids[i:i+500]
+            marks = ",".join("?" * len(chunk))
+            cur.execute(f"SELECT id FROM posts WHERE id IN ({marks})", chunk)
+            found.update(row[0] for row in cur.fetchall())
+            rest = {_archive_key(p): p for p in chunk if p not in found}
+            if rest:
+                marks = ",".join("?" * len(rest))
+                cur.execute(f"SELECT h FROM seen_archive WHERE h IN ({marks})", list(rest))
+                found.update(rest[row[0]] for row in cur.fetchall())
+    return found
 
 def save(conn, pid: str, url: str, title: str, deadline_iso: Optional[str]):
     with closing(conn.cursor()) as cur:
@@ -25,3 +158,302 @@ def save(conn, pid: str, url: str, title: str, deadline_iso: Optional[str]):
             (pid, url, title, deadline_iso)
         )
         conn.commit()
+
+def save_many(conn, rows: Iterable[Tuple[str, str, str, Optional[str]]],
+              outbox: Iterable[Tuple[str, str, str, dict]] = (),
+              dedup: Iterable[Tuple[str, Optional[str], Optional[bytes], Optional[str], List[int]]] = ()) -> int:
+    """
+    Insert (id, url, title, deadline_iso) rows in one transaction; returns rows written.
+    outbox rows (webhook, site, post_id, embed) are queued in the same transaction, so a
+    post is never marked seen without its embed waiting to be delivered. dedup rows
+    (post_id, entry_key, minhash, dup_of, bands) fill in the cross-site dedup columns;
+    bands are only indexed for originals (dup_of is None).
+    """
+    rows = list(rows)
+    outbox = [(w, site, pid, json.dumps(embed)) for w, site, pid, embed in outbox]
+    dedup = list(dedup)
+    if not rows and not outbox:
+        return 0
+    with conn:
+        cur = conn.executemany(
+            "INSERT OR IGNORE INTO posts (id,url,title,deadline_utc) VALUES (?,?,?,?)",
+            rows
+        )
+        written = cur.rowcount
+        if outbox:
+            conn.executemany(
+                "INSERT INTO outbox (webhook,site,post_id,embed_json) VALUES (?,?,?,?)",
+                outbox
+            )
+        if dedup:
+            conn.executemany(
+                "UPDATE posts SET entry_key=?, minhash=?, dup_of=? WHERE id=?",
+                [(key, sig, dup_of, pid) for pid, key, sig, dup_of, _ in dedup]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO post_bands (band,post_id) VALUES (?,?)",
+                [(b, pid) for pid, _, _, dup_of, bands in dedup if dup_of is None for b in bands]
+            )
+    return written
+
+def dedup_candidates(conn, entry_key: Optional[str], bands: List[int]
+                     ) -> List[Tuple[str, str, Optional[str], Optional[bytes], Optional[str], Optional[str]]]:
+    """
+    Original posts (not themselves duplicates) sharing the entry_key or any LSH band, as
+    (id, url, entry_key, minhash, deadline_utc, created_at_utc). Both lookups are index probes.
+    """
+    ids: List[str] = []
+    with closing(conn.cursor()) as cur:
+        if entry_key:
+            cur.execute("SELECT id FROM posts WHERE entry_key=? AND dup_of IS NULL", (entry_key,))
+            ids += [r[0] for r in cur.fetchall()]
+        if bands:
+            marks = ",".join("?" * len(bands))
+            cur.execute(f"SELECT DISTINCT post_id FROM post_bands WHERE band IN ({marks})", bands)
+            ids += [r[0] for r in cur.fetchall()]
+        ids = list(dict.fromkeys(ids))[:500]
+        if not ids:
+            return []
+        marks = ",".join("?" * len(ids))
+        cur.execute(f"SELECT id, url, entry_key, minhash, deadline_utc, created_at_utc FROM posts WHERE id IN ({marks})", ids)
+        by_id = {r[0]: r for r in cur.fetchall()}
+    return [by_id[i] for i in ids if i in by_id]
+
+def claim_outbox(conn, webhook: str, lease: int = 120, limit: int = 100) -> List[Tuple[int, dict, int]]:
+    """
+    Due pending outbox rows for webhook as (id, embed, attempts), oldest first. Claimed rows
+    are pushed lease seconds into the future so a concurrent sender skips them; if we die
+    mid-send they come back after the lease (at-least-once).
+    """
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(
+            "SELECT id, embed_json, attempts FROM outbox "
+            "WHERE status='pending' AND webhook=? AND next_attempt_at<=? ORDER BY id LIMIT ?",
+            (webhook, now, limit)
+        ).fetchall()
+        if rows:
+            marks = ",".join("?" * len(rows))
+            conn.execute(f"UPDATE outbox SET next_attempt_at=? WHERE id IN ({marks})",
+                         [now + lease] + [r[0] for r in rows])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return [(r[0], json.loads(r[1]), r[2]) for r in rows]
+
+def mark_delivered(conn, ids: List[int]):
+    if not ids:
+        return
+    marks = ",".join("?" * len(ids))
+    with conn:
+        conn.execute(
+            f"UPDATE outbox SET status='delivered', delivered_at_utc=CURRENT_TIMESTAMP, last_error=NULL "
+            f"WHERE id IN ({marks})", ids
+        )
+
+def mark_retry(conn, ids: List[int], error: str, delay: float, max_attempts: int, count_attempt: bool = True):
+    """Reschedule ids delay seconds out; rows reaching max_attempts are parked as 'dead'."""
+    if not ids:
+        return
+    marks = ",".join("?" * len(ids))
+    bump = 1 if count_attempt else 0
+    with conn:
+        conn.execute(
+            f"UPDATE outbox SET attempts=attempts+?, next_attempt_at=?, last_error=?, "
+            f"status=CASE WHEN attempts+? >= ? THEN 'dead' ELSE status END "
+            f"WHERE id IN ({marks})",
+            [bump, time.time() + delay, error[:500], bump, max_attempts] + list(ids)
+        )
+
+def outbox_webhooks(conn) -> List[str]:
+    """Webhooks that still have pending (not necessarily due) outbox rows."""
+    with closing(conn.cursor()) as cur:
+        cur.execute("SELECT DISTINCT webhook FROM outbox WHERE status='pending'")
+        return [r[0] for r in cur.fetchall()]
+
+def load_cookies(conn, host: str, max_age: Optional[int] = None) -> Optional[Tuple[str, dict]]:
+    """(user_agent, cookies) stored for host, or None if missing / older than max_age seconds."""
+    sql = "SELECT user_agent, cookies_json FROM http_cookies WHERE host=?"
+    args = [host]
+    if max_age is not None:
+        sql += " AND updated_at_utc >= datetime('now', ?)"
+        args.append(f"-{int(max_age)} seconds")
+    with closing(conn.cursor()) as cur:
+        cur.execute(sql, args)
+        row = cur.fetchone()
+    if not row or not row[1]:
+        return None
+    return row[0] or "", json.loads(row[1])
+
+def save_cookies(conn, host: str, user_agent: str, cookies: dict):
+    with closing(conn.cursor()) as cur:
+        cur.execute(
+            "INSERT OR REPLACE INTO http_cookies (host,user_agent,cookies_json,updated_at_utc) "
+            "VALUES (?,?,?,CURRENT_TIMESTAMP)",
+            (host, user_agent, json.dumps(cookies))
+        )
+        conn.commit()
+
+def load_validators(conn, url: str, max_age: Optional[int] = None) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    """(etag, last_modified) from the last 200 for url, or None if missing / older than max_age seconds."""
+    sql = "SELECT etag, last_modified FROM http_cache WHERE url=?"
+    args = [url]
+    if max_age is not None:
+        sql += " AND stored_at_utc >= datetime('now', ?)"
+        args.append(f"-{int(max_age)} seconds")
+    with closing(conn.cursor()) as cur:
+        cur.execute(sql, args)
+        row = cur.fetchone()
+    if not row or not (row[0] or row[1]):
+        return None
+    return row[0], row[1]
+
+def save_validators(conn, url: str, etag: Optional[str], last_modified: Optional[str]):
+    with closing(conn.cursor()) as cur:
+        if etag or last_modified:
+            cur.execute(
+                "INSERT OR REPLACE INTO http_cache (url,etag,last_modified,stored_at_utc) "
+                "VALUES (?,?,?,CURRENT_TIMESTAMP)",
+                (url, etag, last_modified)
+            )
+        else:
+            cur.execute("DELETE FROM http_cache WHERE url=?", (url,))
+        conn.commit()
+
+def load_discovery(conn, site: str) -> Optional[dict]:
+    """{"last_url", "feed_newest", "retry"} for site, or None before its first successful run."""
+    with closing(conn.cursor()) as cur:
+        cur.execute("SELECT last_url, feed_newest, retry_json FROM discovery_state WHERE site=?", (site,))
+        row = cur.fetchone()
+    if not row:
+        return None
+    return {"last_url": row[0], "feed_newest": row[1], "retry": json.loads(row[2]) if row[2] else {}}
+
+def save_discovery(conn, site: str, state: dict):
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO discovery_state (site,last_url,feed_newest,retry_json,updated_at_utc) "
+            "VALUES (?,?,?,?,CURRENT_TIMESTAMP)",
+            (site, state.get("last_url"), state.get("feed_newest"),
+             json.dumps(state.get("retry") or {}, sort_keys=True))
+        )
+
+def load_breaker(conn, site: str) -> dict:
+    """{"state", "failures", "trips", "open_until", "last_status"}; a closed breaker if none stored."""
+    with closing(conn.cursor()) as cur:
+        cur.execute("SELECT state, failures, trips, open_until, last_status FROM site_breaker WHERE site=?", (site,))
+        row = cur.fetchone()
+    if not row:
+        return {"state": "closed", "failures": 0, "trips": 0, "open_until": 0.0, "last_status": None}
+    return {"state": row[0], "failures": row[1], "trips": row[2], "open_until": row[3], "last_status": row[4]}
+
+def save_breaker(conn, site: str, b: dict):
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO site_breaker (site,state,failures,trips,open_until,last_status,updated_at_utc) "
+            "VALUES (?,?,?,?,?,?,CURRENT_TIMESTAMP)",
+            (site, b["state"], b["failures"], b["trips"], b["open_until"], b["last_status"])
+        )
+
+def _item_default(o):
+    if isinstance(o, datetime):
+        return {"$dt": o.isoformat()}  # keeps the UTC offset, so deadlines and embed dates survive
+    raise TypeError(f"{type(o).__name__} is not JSON serializable")
+
+def _item_hook(d: dict):
+    return datetime.fromisoformat(d["$dt"]) if len(d) == 1 and "$dt" in d else d
+
+def load_items(conn, urls: List[str]) -> Dict[str, Tuple[str, dict, float]]:
+    """url -> (body_hash, item, cached_at) for the cached ones; datetimes come back aware."""
+    out: Dict[str, Tuple[str, dict, float]] = {}
+    with closing(conn.cursor()) as cur:
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            cur.execute(f"SELECT url, body_hash, item_json, cached_at FROM item_cache WHERE url IN ({marks})", chunk)
+            for url, h, item, at in cur.fetchall():
+                out[url] = (h, json.loads(item, object_hook=_item_hook), at)
+    return out
+
+def save_items(conn, rows: Iterable[Tuple[str, str, dict, float]]):
+    """Store (url, body_hash, item, cached_at) rows in one transaction, replacing older ones."""
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO item_cache (url,body_hash,item_json,cached_at) VALUES (?,?,?,?)",
+            [(url, h, json.dumps(item, default=_item_default), at) for url, h, item, at in rows]
+        )
+
+def prune_items(conn, keep_days: int) -> int:
+    """Drop cached items stored more than keep_days ago."""
+    with conn:
+        cur = conn.execute("DELETE FROM item_cache WHERE cached_at < ?", (time.time() - keep_days * 86400,))
+    return cur.rowcount
+
+def claim_meta_after(conn, key: str, not_before: float, now: float) -> bool:
+    """
+    Atomically set meta[key]=now if its stored timestamp is older than not_before; True if we
+    took it. Lets several runners (cron + daemon threads) agree on who runs a periodic job.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        due = row is None or float(row[0] or 0) < not_before
+        if due:
+            conn.execute("INSERT OR REPLACE INTO meta (key,value) VALUES (?,?)", (key, repr(now)))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return due
+
+def archive_expired(conn, deadline_before: str, undated_before_days: int, chunk: int = 1000) -> int:
+    """
+    Move posts whose deadline_utc is before deadline_before (ISO, UTC), or that have no
+    deadline and were created more than undated_before_days ago, into seen_archive. Their
+    LSH bands go too; a reappearing URL is still caught by seen_many. Returns rows archived.
+    """
+    total = 0
+    while True:
+        with conn:
+            ids = [r[0] for r in conn.execute(
+                "SELECT id FROM posts WHERE deadline_utc < ? "
+                "UNION ALL SELECT id FROM posts WHERE deadline_utc IS NULL AND created_at_utc < datetime('now', ?) "
+                "LIMIT ?",
+                (deadline_before, f"-{int(undated_before_days)} days", chunk)
+            )]
+            if not ids:
+                break
+            marks = ",".join("?" * len(ids))
+            conn.executemany("INSERT OR IGNORE INTO seen_archive (h) VALUES (?)", [(_archive_key(i),) for i in ids])
+            conn.execute(f"DELETE FROM post_bands WHERE post_id IN ({marks})", ids)
+            conn.execute(f"DELETE FROM posts WHERE id IN ({marks})", ids)
+        total += len(ids)
+        if len(ids) < chunk:
+            break
+    return total
+
+def prune_outbox(conn, keep_days: int) -> int:
+    """Drop delivered/dead outbox rows older than keep_days; pending rows are never touched."""
+    with conn:
+        cur = conn.execute(
+            "DELETE FROM outbox WHERE status IN ('delivered','dead') AND created_at_utc < datetime('now', ?)",
+            (f"-{int(keep_days)} days",)
+        )
+    return cur.rowcount
+
+def incremental_vacuum(conn, pages: int) -> Tuple[int, int]:
+    """
+    Return up to pages free pages to the OS; (free pages before, after). A file created
+    before auto_vacuum=INCREMENTAL was set gets a one-time full VACUUM to switch modes.
+    """
+    conn.commit()  # VACUUM can't run inside a transaction
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+    else:
+        # each step of this pragma frees one page and execute() only steps once; executescript runs it out
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+    return before, conn.execute("PRAGMA freelist_count").fetchone()[0]